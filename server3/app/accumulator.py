@@ -4,18 +4,27 @@ import json
 import threading
 import time
 from collections import deque
+from concurrent.futures import Future
 import numpy as np
 import cv2
 import torch
-import redis
 import os
-from constants import REDIS_HOST, REDIS_PORT
+import socket
+import redis
+from redis_pool import get_redis
 import logging
 from monitoring import INFERENCE_OUTPUT_PROB_SUMMARY, EVENT_TRIGGERED, EVENT_COOLDOWN_REMAINING, FRAME_BUFFER_LENGTH, BUFFER_ADD_DURATION, EVENT_SAVE_DURATION
+from monitoring import WINDOWS_INFERRED, WINDOWS_SKIPPED
 from constants import (
     BUFFER_SIZE, DECISION_WINDOW, SAVE_DURATION,
-    PRED_THRESHOLD, COOLDOWN_PERIOD, MAX_INTER_FRAME_DELAY, EXPECTED_FPS
+    PRED_THRESHOLD, COOLDOWN_PERIOD, MAX_INTER_FRAME_DELAY, EXPECTED_FPS,
+    INFERENCE_MODE, STREAMING_DECISION_WINDOW, STREAMING_MAX_SKIP
 )
+from detector import INPUT_SIZE
+from motion import MotionGate
+# 쿨다운 lock 소유 노드 표시용
+NODE_ID = f"{socket.gethostname()}:{os.getpid()}"
+
 # 로깅 설정
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -25,61 +34,188 @@ formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 ch.setFormatter(formatter)
 logger.addHandler(ch)
 
+class InferenceJob:
+    """
+    추론 요청 1건
+    - frames    : 윈도우 모드는 [BUFFER_SIZE, 224, 224, 3] uint8, 스트리밍 모드는 프레임 1개 [224, 224, 3]
+    - timestamp : 윈도우 모드는 프레임별 timestamp 리스트, 스트리밍 모드는 해당 프레임 timestamp
+    - timestamps: 판단/알림 영상 저장 구간 계산에 쓰는 timestamp 리스트
+    """
+    def __init__(self, frames, timestamp, timestamps):
+        self.frames = frames
+        self.timestamp = timestamp
+        self.timestamps = timestamps
+
 class FrameAccumulator:
-    def __init__(self, serial_number, inference_engine, dispatcher):
+    def __init__(self, serial_number, inference_engine, dispatcher, scheduler=None):
         self.serial_number = serial_number
         self.inference_engine = inference_engine
         self.dispatcher = dispatcher
-        self.buffer = deque()
-        self.pred_history = deque(maxlen=DECISION_WINDOW)
-        self.redis_pub = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+        self.scheduler = scheduler
+        self.streaming = INFERENCE_MODE == "streaming"
+        self.decision_window = STREAMING_DECISION_WINDOW if self.streaming else DECISION_WINDOW
+        # 고정 크기 ring buffer: 224x224 로 축소된 uint8 프레임 + timestamp (카메라별 1회 할당)
+        self.frames = np.empty((BUFFER_SIZE, INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)
+        self.timestamps = np.zeros(BUFFER_SIZE, dtype=np.float64)
+        self.motion_scores = np.zeros(BUFFER_SIZE, dtype=np.float32)
+        self.motion_gate = MotionGate()
+        self.stream_fed = None  # 스트리밍 모드: 마지막으로 step 을 추론한 프레임 timestamp (초)
+        self.head = 0   # 다음에 기록할 슬롯
+        self.count = 0  # 유효 프레임 수
+        self.pred_history = deque(maxlen=self.decision_window)
+        self.redis_pub = get_redis()  # 공유 연결 풀 사용
         self.last_save_time = 0
+        self.last_active = time.monotonic()  # CameraRegistry 의 유휴 / LRU 제거 기준
         self.lock = threading.Lock() 
+        self.state_lock = threading.Lock()  # ring buffer 변경 (lane 스레드) vs export_state (snapshot / handoff 스레드)
 
-    # 1) add preprocessed frame[only crop the ROI] in the buffer (30 frames)
+    # 1) add preprocessed frame[ROI crop resized to 224x224] in the ring buffer (BUFFER_SIZE frames)
     @BUFFER_ADD_DURATION.time()
     def add_frame(self, frame, timestamp):
+        # 동기 경로: 버퍼 추가 -> (윈도우가 차면) 추론 대기 -> 판단
+        job = self.collect(frame, timestamp)
+        if job is not None:
+            self.finish(job, self.submit(job).result())
+
+    def collect(self, frame, timestamp):
+        # 링 버퍼에 프레임 추가. 추론할 윈도우(스트리밍 모드는 프레임)가 생기면 InferenceJob 반환, 아니면 None
+        with self.state_lock:
+            return self._collect(frame, timestamp)
+
+    def _collect(self, frame, timestamp):
         timestamp = timestamp / 1000  # 밀리초 -> 초
         recv_time = time.time()  # 초 
+        self.last_active = time.monotonic()
         logger.info(f"[{self.serial_number}] Received frame with timestamp: {timestamp}, current recv_time: {recv_time}")
 
-        if self.buffer and (timestamp - self.buffer[-1][1]) > MAX_INTER_FRAME_DELAY:
-            logger.warning(f"[{self.serial_number}] Buffer cleared due to delay: Δt = {timestamp - self.buffer[-1][1]:.2f}s")
-            self.buffer.clear()  
-
-        self.buffer.append((frame, timestamp))
-
-        FRAME_BUFFER_LENGTH.labels(serial_number=self.serial_number).set(len(self.buffer))
-
-        if len(self.buffer) >= BUFFER_SIZE:
-            batch = [f for f, _ in list(self.buffer)[-BUFFER_SIZE:]]
-            timestamps = [t for _, t in list(self.buffer)[-BUFFER_SIZE:]]
-            self._process_batch(batch, timestamps)
-
-            stride = BUFFER_SIZE // 2
-            for _ in range(stride):
-                if self.buffer:
-                    self.buffer.popleft()
-
-    # 2) determine the result (input to the AI model -> evaluation sum/3)
-    def _process_batch(self, frames, timestamps):
-        outputs = self.inference_engine.run_batch_inference(frames)
+        last_timestamp = self.timestamps[(self.head - 1) % BUFFER_SIZE]
+        if self.count and abs(timestamp - last_timestamp) > MAX_INTER_FRAME_DELAY:  # 끊김 또는 카메라 시계가 뒤로 감
+            logger.warning(f"[{self.serial_number}] Buffer cleared due to delay: Δt = {timestamp - last_timestamp:.2f}s")
+            self.count = 0
+            self.motion_gate.reset()
+            if self.streaming:
+                self.inference_engine.reset_stream(self.serial_number)
+                self.stream_fed = None
+
+        slot = self.head
+        self.inference_engine.resize_frame(frame, out=self.frames[slot])
+        self.timestamps[slot] = timestamp
+        self.motion_scores[slot] = self.motion_gate.score(self.frames[slot])
+        self.head = (slot + 1) % BUFFER_SIZE
+        self.count = min(self.count + 1, BUFFER_SIZE)
+
+        FRAME_BUFFER_LENGTH.labels(serial_number=self.serial_number).set(self.count)
+
+        # 스트리밍 모드: 프레임마다 GRU hidden state 를 이어서 추론
+        if self.streaming:
+            if not self._gate([self.motion_scores[slot]]):
+                # 건너뛴 step 은 hidden state 에 반영되지 않으므로, 오래 건너뛰면 끊긴 구간 이전 상태를 버리고 새로 시작
+                if self.stream_fed is not None and timestamp - self.stream_fed > STREAMING_MAX_SKIP:
+                    self.inference_engine.reset_stream(self.serial_number)
+                    self.stream_fed = None
+                return None
+            self.stream_fed = timestamp
+            return InferenceJob(self.frames[slot], timestamp, self.timestamps[self._window(self.count)].tolist())
+
+        if self.count < BUFFER_SIZE:
+            return None
+        idx = self._window(BUFFER_SIZE)
+        stride = BUFFER_SIZE // 2
+        self.count -= stride
+        if not self._gate(self.motion_scores[idx]):
+            return None
+        timestamps = self.timestamps[idx].tolist()
+        return InferenceJob(self.frames[idx], timestamps, timestamps)
+
+    def export_state(self):
+        # 클러스터 handoff / snapshot 용: ring buffer 의 최근 프레임 + 판단 이력 + 쿨다운
+        # (state_lock: lane 스레드가 프레임을 쓰는 도중의 frames / timestamps / count 를 섞어 읽지 않도록)
+        # warm start: 윈도우 모드는 stride 로 이미 소비한 프레임까지 최대 BUFFER_SIZE - 1 개를 내보내
+        #             복원 후 첫 프레임에서 바로 윈도우가 차도록 함 (버퍼 초기화 이전 / 빈 슬롯은 제외)
+        with self.state_lock:
+            idx = np.arange(BUFFER_SIZE)[self._window(BUFFER_SIZE)]
+            newest = self.timestamps[(self.head - 1) % BUFFER_SIZE]
+            idx = idx[(self.timestamps[idx] > 0) & (newest - self.timestamps[idx] <= MAX_INTER_FRAME_DELAY)]
+            idx = idx[len(idx) - min(len(idx), BUFFER_SIZE if self.streaming else BUFFER_SIZE - 1):]
+            return {
+                "frames": self.frames[idx].copy(),
+                "timestamps": self.timestamps[idx].copy(),
+                "motion_scores": self.motion_scores[idx].copy(),
+                "pred_history": [bool(p) for p in list(self.pred_history)],
+                "last_save_time": self.last_save_time,
+            }
+
+    def restore_state(self, state):
+        count = len(state["timestamps"])
+        with self.state_lock:
+            self.frames[:count] = state["frames"]
+            self.timestamps[:count] = state["timestamps"]
+            self.motion_scores[:count] = state["motion_scores"]
+            self.head = count % BUFFER_SIZE
+            self.count = count
+            if count:
+                self.motion_gate.score(self.frames[count - 1])  # 다음 프레임의 움직임 비교 기준
+                self.stream_fed = float(self.timestamps[count - 1])
+        self.pred_history = deque(state["pred_history"], maxlen=self.decision_window)
+        self.last_save_time = state["last_save_time"]
+
+    def nbytes(self):
+        # ring buffer + 움직임 게이트 이전 프레임 (latent 캐시 / 스트리밍 상태는 InferenceEngine.state_nbytes)
+        prev = self.motion_gate.prev
+        return self.frames.nbytes + self.timestamps.nbytes + self.motion_scores.nbytes + (prev.nbytes if prev is not None else 0)
+
+    def _window(self, n):
+        # 가장 최근 n 개 슬롯 (오래된 순). 슬롯이 연속이면 slice(복사 없는 view), 아니면 index 배열(한 번의 gather)
+        start = (self.head - n) % BUFFER_SIZE
+        if start + n <= BUFFER_SIZE:
+            return slice(start, start + n)
+        return (start + np.arange(n)) % BUFFER_SIZE
+
+    def _gate(self, motion_scores):
+        # 움직임 없는 구간은 추론 생략 (최근 양성 판단이 있으면 항상 추론)
+        if self.motion_gate.should_infer(motion_scores, suspected=any(self.pred_history)):
+            WINDOWS_INFERRED.inc()
+            return True
+        WINDOWS_SKIPPED.inc()
+        logger.debug(f"[{self.serial_number}] Inference skipped by motion gate (max score {max(motion_scores):.4f})")
+        return False
+
+    # 2) submit the window (streaming: frame) to the scheduler -> Future[logits]
+    def submit(self, job):
+        # 스케줄러가 있으면 다른 카메라 윈도우와 함께 배치 추론
+        # (링 버퍼 view 는 submit 안에서 전처리/gather 되므로 반환 후 슬롯이 덮어써져도 안전)
+        if self.scheduler is not None:
+            if self.streaming:
+                return self.scheduler.submit_step(self.serial_number, job.frames, job.timestamp)
+            return self.scheduler.submit(self.serial_number, job.frames, job.timestamp)
+
+        future = Future()
+        if self.streaming:
+            future.set_result(self.inference_engine.run_step(self.serial_number, job.frames, job.timestamp))
+        else:
+            future.set_result(self.inference_engine.run_window(self.serial_number, job.frames, job.timestamp))
+        return future
+
+    # 2-1) determine the result (input to the AI model -> evaluation sum/3)
+    def finish(self, job, outputs):
         if outputs is None:
             logger.info(f"[{self.serial_number}] Inference skipped: insufficient frame count.")
             return
+        self._decide(outputs, job.timestamps)
 
+    def _decide(self, outputs, timestamps):
         probs = torch.softmax(outputs, dim=1)[:, 1].cpu().numpy()
 
         for prob in probs:
             self.pred_history.append(prob > PRED_THRESHOLD)
             INFERENCE_OUTPUT_PROB_SUMMARY.labels(serial_number=self.serial_number).observe(prob)
 
-        self.pred_history = list(self.pred_history)[-DECISION_WINDOW:]
+        self.pred_history = list(self.pred_history)[-self.decision_window:]
         positive_count = sum(self.pred_history)
-        logger.info(f"[{self.serial_number}] Prediction probs: {probs.round(3).tolist()} / Over {PRED_THRESHOLD}: {positive_count}/{DECISION_WINDOW}")
+        logger.info(f"[{self.serial_number}] Prediction probs: {probs.round(3).tolist()} / Over {PRED_THRESHOLD}: {positive_count}/{self.decision_window}")
 
         # 딥러닝 확률 임계치 기반 판단만 수행
-        if positive_count == DECISION_WINDOW:
+        if positive_count == self.decision_window:
             triggered = self._trigger_event(timestamps)
             if triggered:
                 self.pred_history.clear()
@@ -96,6 +232,10 @@ class FrameAccumulator:
                 logger.debug(f"[{self.serial_number}] Event skipped due to cooldown: {remaining:.2f}s remaining.")
                 return False
             
+            if not self._acquire_cooldown():
+                logger.debug(f"[{self.serial_number}] Event skipped: cooldown held by another node.")
+                return False
+
             self.last_save_time = now
             logger.debug(f"[{self.serial_number}] Event triggered and last_save_time updated.")
 
@@ -103,6 +243,15 @@ class FrameAccumulator:
         threading.Thread(target=self._save_alert, args=(timestamps,), daemon=True).start()
         return True
 
+    def _acquire_cooldown(self):
+        # Redis 기반 쿨다운 lock: 카메라 담당 노드가 바뀌는 중에도 알림이 중복되지 않도록 SET NX EX
+        # (Redis 장애 시에는 로컬 last_save_time 기준으로만 판단)
+        try:
+            return bool(self.redis_pub.set(f"cooldown:{self.serial_number}", NODE_ID, nx=True, ex=COOLDOWN_PERIOD))
+        except redis.RedisError as e:
+            logger.warning(f"[{self.serial_number}] Cooldown lock unavailable, using local cooldown: {e}")
+            return True
+
     # 4) When the event triggered, save the video & alarm to the API[center] server
     @EVENT_SAVE_DURATION.time()
     def _save_alert(self, timestamps):
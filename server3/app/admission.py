@@ -0,0 +1,60 @@
+# app/admission.py
+# [설명] : 과부하 시 프레임 수용 제어 (load shedding)
+#   - 전체 in-flight 프레임 예산: 일반 카메라는 예산의 (1 - ADMISSION_RESERVED) 까지만 받고,
+#     최근 양성 판단(pred_history)이 있는 카메라는 남겨둔 예산까지 사용 -> 낙상 의심 카메라는 유휴 카메라 때문에 밀리지 않음
+#   - 거절 시 RESOURCE_EXHAUSTED + retry-after-ms 힌트 (trailing metadata / ack status)
+#   - 과부하(in-flight 가 일반 카메라 한도 이상)일 때만, 큐 안에서 ADMISSION_SHED_AGE 이상 기다린 일반 카메라 프레임을
+#     오래된 것부터 버림 (의심 카메라 프레임은 유지, 과부하가 아니면 잠깐 밀린 프레임도 그대로 처리)
+import logging
+from monitoring import ADMISSION_REJECTED, ADMISSION_INFLIGHT, FRAMES_SHED
+from constants import (
+    ADMISSION_MAX_INFLIGHT, ADMISSION_RESERVED, ADMISSION_SHED_AGE,
+    ADMISSION_RETRY_MIN_MS, ADMISSION_RETRY_MAX_MS, EXPECTED_FPS
+)
+
+logger = logging.getLogger(__name__)
+
+class Overloaded(Exception):
+    """서버 과부하로 프레임을 받지 않음 (RPC 에는 RESOURCE_EXHAUSTED + retry-after-ms 로 응답)"""
+    def __init__(self, message, retry_after_ms=ADMISSION_RETRY_MIN_MS):
+        super().__init__(message)
+        self.retry_after_ms = retry_after_ms
+
+class AdmissionController:
+    """
+    - inflight()          : 현재 처리 대기 중인 프레임 수 (파이프라인 큐 길이 합 등)
+    - suspected(serial)   : 해당 카메라가 최근 양성 판단을 가지고 있는지
+    - admit(serial)       : 받을 수 없으면 Overloaded 발생
+    - shed(serial, age)   : 과부하 상태에서 큐에서 age 초 기다린 프레임을 버려야 하는지 (오래된 것부터 버림)
+    """
+    def __init__(self, inflight, suspected, max_inflight=ADMISSION_MAX_INFLIGHT, reserved=ADMISSION_RESERVED):
+        self.inflight = inflight
+        self.suspected = suspected
+        self.max_inflight = max_inflight
+        self.normal_limit = int(max_inflight * (1 - reserved))
+
+    def admit(self, serial_number):
+        inflight = self.inflight()
+        ADMISSION_INFLIGHT.set(inflight)
+        priority = self.suspected(serial_number)
+        limit = self.max_inflight if priority else self.normal_limit
+        if inflight < limit:
+            return
+        ADMISSION_REJECTED.labels(priority="suspected" if priority else "normal").inc()
+        raise Overloaded(
+            f"Admission rejected frame from {serial_number}: {inflight} frames in flight (limit {limit})",
+            retry_after_ms=self.retry_after_ms(inflight)
+        )
+
+    def retry_after_ms(self, inflight):
+        # 예산 대비 초과 정도에 비례 (기준: 프레임 간격 1개), [MIN, MAX] 범위로 제한
+        interval_ms = 1000 / EXPECTED_FPS
+        hint = int(interval_ms * inflight / max(self.normal_limit, 1))
+        return max(ADMISSION_RETRY_MIN_MS, min(ADMISSION_RETRY_MAX_MS, hint))
+
+    def shed(self, serial_number, age):
+        # age 는 버릴 프레임을 고르는 기준일 뿐, 버리기 시작하는 조건은 과부하 (GC / 풀 기동 등 일시 정체로는 버리지 않음)
+        if age < ADMISSION_SHED_AGE or self.inflight() < self.normal_limit or self.suspected(serial_number):
+            return False
+        FRAMES_SHED.inc()
+        return True
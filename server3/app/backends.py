@@ -0,0 +1,180 @@
+# app/backends.py
+# [설명] : 추론 백엔드 (eager / torchscript / compile / onnx)
+#   - 모든 백엔드는 logits 전용 그래프만 사용 (ae_decoder, dropout 제외)
+#   - encode   : [N, C, H, W] -> [N, ae_latent_dim]  (CNN + ae_encoder, 프레임 단위)
+#   - classify : [B, seq, ae_latent_dim] -> [B, num_classes]  (GRU + Transformer + fc_cls)
+#   - 스트리밍 step(GRU hidden state 유지)은 eager 모델에서 실행, encode 만 백엔드 사용
+import os
+import copy
+import logging
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+from constants import ORT_INTRA_OP_THREADS, OPTIMIZE_GRAPH
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+ch = logging.StreamHandler()
+ch.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+ch.setFormatter(formatter)
+logger.addHandler(ch)
+
+class FrameEncoder(nn.Module):
+    """
+    추론 전용 그래프 1: CNN 백본 + ae_encoder (ae_decoder 제외)
+    - 원본 모델(체크포인트/GradCAM 용)과 분리하기 위해 모듈을 복사해서 사용
+    """
+    def __init__(self, model):
+        super().__init__()
+        self.cnn = copy.deepcopy(model.cnn)
+        self.ae_encoder = copy.deepcopy(model.ae_encoder)
+
+    def forward(self, x):
+        return self.ae_encoder(self.cnn(x))
+
+class SequenceClassifier(nn.Module):
+    """
+    추론 전용 그래프 2: GRU + Transformer + fc_cls
+    """
+    def __init__(self, model):
+        super().__init__()
+        self.gru = copy.deepcopy(model.gru)
+        self.transformer = copy.deepcopy(model.transformer)
+        self.fc_cls = copy.deepcopy(model.fc_cls)
+
+    def forward(self, latent_seq):
+        gru_out, _ = self.gru(latent_seq)
+        trans_out = self.transformer(gru_out)
+        return self.fc_cls(trans_out[:, -1, :])
+
+def fold_conv_bn(module):
+    """
+    eval 모드 BatchNorm2d 를 바로 앞 Conv2d 가중치/바이어스에 합치고 BN 은 Identity 로 교체
+    - convN / bnN 속성 쌍 (stem, BottleneckSE 내부, 마지막 conv2)
+    - Sequential 안의 Conv2d -> BatchNorm2d 연속 (BottleneckSE shortcut)
+    """
+    for parent in list(module.modules()):
+        if isinstance(parent, nn.Sequential):
+            children = list(parent._modules.items())
+            for (conv_name, conv), (bn_name, bn) in zip(children, children[1:]):
+                if isinstance(conv, nn.Conv2d) and isinstance(bn, nn.BatchNorm2d):
+                    parent._modules[conv_name] = fuse_conv_bn_eval(conv, bn)
+                    parent._modules[bn_name] = nn.Identity()
+            continue
+
+        for name, child in list(parent.named_children()):
+            if not (isinstance(child, nn.Conv2d) and name.startswith("conv")):
+                continue
+            bn_name = "bn" + name[len("conv"):]
+            bn = getattr(parent, bn_name, None)
+            if isinstance(bn, nn.BatchNorm2d):
+                setattr(parent, name, fuse_conv_bn_eval(child, bn))
+                setattr(parent, bn_name, nn.Identity())
+    return module
+
+class EagerBackend:
+    name = "eager"
+
+    def __init__(self, model, model_path, seq_len, optimize=OPTIMIZE_GRAPH):
+        self.encoder = FrameEncoder(model).eval()
+        self.classifier = SequenceClassifier(model).eval()
+
+        # conv+BN 폴딩 + channels_last (체크포인트/eager 모델은 그대로, 복사본에만 적용)
+        self.memory_format = torch.contiguous_format
+        if optimize:
+            fold_conv_bn(self.encoder)
+            self.memory_format = torch.channels_last
+            self.encoder = self.encoder.to(memory_format=self.memory_format)
+
+    def encode(self, frames):
+        return self.encoder(frames.contiguous(memory_format=self.memory_format))
+
+    def classify(self, latent_seq):
+        return self.classifier(latent_seq)
+
+class TorchScriptBackend(EagerBackend):
+    name = "torchscript"
+
+    def __init__(self, model, model_path, seq_len):
+        super().__init__(model, model_path, seq_len)
+        self.encoder = torch.jit.optimize_for_inference(torch.jit.script(self.encoder))
+        self.classifier = torch.jit.optimize_for_inference(torch.jit.script(self.classifier))
+
+class CompileBackend(EagerBackend):
+    name = "compile"
+
+    def __init__(self, model, model_path, seq_len):
+        super().__init__(model, model_path, seq_len)
+        self.encoder = torch.compile(self.encoder, dynamic=True)
+        self.classifier = torch.compile(self.classifier, dynamic=True)
+
+class OnnxBackend:
+    """
+    ONNX Runtime (CPUExecutionProvider)
+    - 체크포인트 옆에 <checkpoint>.encoder.onnx / <checkpoint>.classifier.onnx 로 export (체크포인트가 더 최신이면 재생성)
+    - classifier 는 seq 길이가 그래프에 고정되므로 seq_len(BUFFER_SIZE) 윈도우 전용, batch 축만 동적
+    """
+    name = "onnx"
+
+    def __init__(self, model, model_path, seq_len):
+        import onnxruntime as ort
+
+        self.seq_len = seq_len
+        base = os.path.splitext(model_path)[0]
+        encoder_path = f"{base}.encoder.onnx"
+        classifier_path = f"{base}.classifier.onnx"
+
+        encoder = FrameEncoder(model).eval()
+        classifier = SequenceClassifier(model).eval()
+        latent_dim = model.gru.input_size
+        self._export(encoder, torch.zeros(1, 3, 224, 224), encoder_path, model_path,
+                     input_name="frames", output_name="latent", dynamic_axes={0: "n"})
+        self._export(classifier, torch.zeros(1, seq_len, latent_dim), classifier_path, model_path,
+                     input_name="latent_seq", output_name="logits", dynamic_axes={0: "batch"})
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ORT_INTRA_OP_THREADS > 0:
+            options.intra_op_num_threads = ORT_INTRA_OP_THREADS
+        providers = ["CPUExecutionProvider"]
+        self.encoder = ort.InferenceSession(encoder_path, options, providers=providers)
+        self.classifier = ort.InferenceSession(classifier_path, options, providers=providers)
+
+    @staticmethod
+    def _export(module, example, path, model_path, input_name, output_name, dynamic_axes):
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(model_path):
+            return
+        logger.info(f"Exporting ONNX graph: {path}")
+        # grad 활성 상태로 export 해야 Transformer fast-path(_transformer_encoder_layer_fwd)를 피함
+        with torch.enable_grad():
+            torch.onnx.export(
+                module, example, path,
+                input_names=[input_name], output_names=[output_name],
+                dynamic_axes={input_name: dynamic_axes, output_name: {0: dynamic_axes[0]}},
+                opset_version=17, dynamo=False
+            )
+
+    def encode(self, frames):
+        latent = self.encoder.run(None, {"frames": frames.contiguous().numpy()})[0]
+        return torch.from_numpy(latent)
+
+    def classify(self, latent_seq):
+        if latent_seq.shape[1] != self.seq_len:
+            raise ValueError(f"ONNX classifier expects seq_len={self.seq_len}, got {latent_seq.shape[1]}")
+        logits = self.classifier.run(None, {"latent_seq": latent_seq.contiguous().numpy()})[0]
+        return torch.from_numpy(logits)
+
+BACKENDS = {
+    EagerBackend.name: EagerBackend,
+    TorchScriptBackend.name: TorchScriptBackend,
+    CompileBackend.name: CompileBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+def build_backend(name, model, model_path, seq_len):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name} (available: {', '.join(BACKENDS)})")
+    logger.info(f"Inference backend: {name}")
+    return BACKENDS[name](model, model_path, seq_len)
@@ -0,0 +1,151 @@
+# app/cluster.py
+# [설명] : 여러 server3 노드에 카메라 분산 (CLUSTER_MODE)
+#   - 멤버십: 노드마다 Redis sorted set(cluster:members)에 heartbeat (score = 마지막 heartbeat 시각)
+#   - consistent hashing (노드당 CLUSTER_VNODES 개 가상 노드, md5) 으로 serial_number -> 담당 노드
+#   - 담당이 아닌 카메라 프레임은 받지 않고 담당 노드 주소를 알려줌 (ingress 는 LookupOwner 로 미리 라우팅 가능)
+#   - 멤버십이 바뀌면 더 이상 담당이 아닌 카메라 상태를 Redis(cluster:handoff:{serial})로 넘기고 로컬에서 제거,
+#     새 담당 노드는 accumulator 생성 시 그 상태를 가져감 (직렬화는 snapshot 과 같은 np.savez, pickle 사용 안 함)
+#   - 새 ring 은 넘길 카메라를 모두 넘긴 뒤에 교체 (그 사이 넘기는 카메라는 새 담당 노드로 안내)
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+import redis
+from redis_pool import get_redis
+from snapshot import encode_state
+from monitoring import CLUSTER_NODES, CLUSTER_HANDOFFS
+from constants import (
+    GRPC_PORT, CLUSTER_VNODES, CLUSTER_HEARTBEAT_INTERVAL, CLUSTER_NODE_TTL, CLUSTER_HANDOFF_TTL
+)
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+ch = logging.StreamHandler()
+ch.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+ch.setFormatter(formatter)
+logger.addHandler(ch)
+
+MEMBERS_KEY = "cluster:members"
+HANDOFF_KEY = "cluster:handoff:{}"
+
+# 다른 노드가 접속할 이 노드의 gRPC 주소 (컨테이너마다 환경 변수로 지정)
+NODE_ADDRESS = os.environ.get("CLUSTER_NODE_ADDRESS") or f"{socket.gethostname()}:{GRPC_PORT}"
+
+class NotOwner(Exception):
+    """이 노드가 담당하지 않는 카메라 (RPC 에는 FAILED_PRECONDITION + cluster-owner 메타데이터로 응답)"""
+    def __init__(self, serial_number, owner):
+        super().__init__(f"Camera {serial_number} is owned by {owner}")
+        self.owner = owner
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+class HashRing:
+    """
+    노드 주소 목록 -> 정렬된 가상 노드 위치. owner(serial) 는 serial 해시 이후 첫 가상 노드의 주인
+    (노드 1개가 빠지거나 추가되면 그 노드 몫의 카메라만 옮겨감)
+    """
+    def __init__(self, nodes, vnodes=CLUSTER_VNODES):
+        self.nodes = sorted(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self.keys = [key for key, _ in points]
+        self.owners = [node for _, node in points]
+
+    def owner(self, serial_number):
+        if not self.keys:
+            return None
+        i = bisect.bisect(self.keys, _hash(serial_number)) % len(self.keys)
+        return self.owners[i]
+
+class ClusterMembership:
+    """
+    - owner(serial) / owns(serial) : 현재 ring 기준 담당 노드
+    - take_handoff(serial)         : 다른 노드가 넘긴 카메라 상태 bytes (snapshot.restore_state 로 복원, 없으면 None)
+    - 백그라운드 스레드가 heartbeat + ring 갱신 + 담당이 바뀐 카메라 상태 handoff
+    """
+    def __init__(self, registry, address=NODE_ADDRESS):
+        self.registry = registry
+        self.address = address
+        self.redis = get_redis()
+        self.ring = HashRing([address])
+        self.pending = None  # handoff 중인 새 ring
+        self.heartbeat()
+        self.thread = threading.Thread(target=self._run, name="cluster-membership", daemon=True)
+        self.thread.start()
+
+    def owner(self, serial_number):
+        owner = self.ring.owner(serial_number)
+        pending = self.pending
+        if pending is not None and owner == self.address:
+            # handoff 중: 넘기는 카메라는 새 담당 노드로 안내 (넘긴 직후 로컬에서 다시 만들지 않도록)
+            return pending.owner(serial_number)
+        return owner
+
+    def owns(self, serial_number):
+        return self.owner(serial_number) == self.address
+
+    def heartbeat(self):
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.zadd(MEMBERS_KEY, {self.address: now})
+        pipe.zremrangebyscore(MEMBERS_KEY, 0, now - CLUSTER_NODE_TTL)  # heartbeat 가 끊긴 노드 제거
+        pipe.zrange(MEMBERS_KEY, 0, -1)
+        nodes = [node.decode() for node in pipe.execute()[-1]]
+        if self.address not in nodes:
+            nodes.append(self.address)
+        if sorted(nodes) != self.ring.nodes:
+            logger.info(f"Cluster membership changed: {self.ring.nodes} -> {sorted(nodes)}")
+            # 넘길 카메라를 먼저 넘기고 ring 교체 (새 ring 을 먼저 공개하면 넘기기 전 상태로 새 노드가 시작할 수 있음)
+            ring = HashRing(nodes)
+            self.pending = ring
+            try:
+                self.hand_off(ring)
+                self.ring = ring
+            finally:
+                self.pending = None
+        CLUSTER_NODES.set(len(nodes))
+
+    def hand_off(self, ring):
+        # ring 기준으로 담당이 바뀐 카메라: 상태를 Redis 로 넘기고 로컬 상태 제거
+        for serial_number in list(self.registry.accumulators):
+            owner = ring.owner(serial_number)
+            if owner == self.address:
+                continue
+            accumulator = self.registry.get(serial_number)
+            if accumulator is None:
+                continue
+            data = encode_state(accumulator, self.registry.inference_engine)
+            self.redis.set(HANDOFF_KEY.format(serial_number), data, ex=CLUSTER_HANDOFF_TTL)
+            self.registry.evict(serial_number, "handoff")
+            CLUSTER_HANDOFFS.labels(direction="out").inc()
+            logger.info(f"[{serial_number}] Camera state handed off to {owner}")
+
+    def take_handoff(self, serial_number):
+        key = HANDOFF_KEY.format(serial_number)
+        pipe = self.redis.pipeline()
+        pipe.get(key)
+        pipe.delete(key)
+        data = pipe.execute()[0]
+        if data is None:
+            return None
+        CLUSTER_HANDOFFS.labels(direction="in").inc()
+        return data
+
+    def leave(self):
+        # 정상 종료 시 멤버십에서 바로 빠짐 (남은 노드가 TTL 을 기다리지 않고 ring 재구성)
+        self.redis.zrem(MEMBERS_KEY, self.address)
+
+    def _run(self):
+        while True:
+            time.sleep(CLUSTER_HEARTBEAT_INTERVAL)
+            try:
+                self.heartbeat()
+            except redis.RedisError as e:
+                logger.warning(f"Cluster heartbeat failed: {e}")
+            except Exception as e:
+                logger.exception(f"Cluster membership update failed: {e}")
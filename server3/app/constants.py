@@ -25,4 +25,150 @@ MAX_INTER_FRAME_DELAY = 10
 
 # 8) redis 설정값
 REDIS_HOST = "redis"
-REDIS_PORT = 6379
\ No newline at end of file
+REDIS_PORT = 6379
+
+# 9) 카메라 간 동적 배치 추론 (최대 배치 크기 / 첫 요청 이후 최대 대기 시간[초])
+MAX_BATCH_SIZE = 16
+MAX_BATCH_WAIT = 0.01
+
+# 10) 추론 모드: "window" (BUFFER_SIZE 윈도우 단위) / "streaming" (프레임 단위, GRU hidden state 유지)
+INFERENCE_MODE = "window"
+# 10-1) 스트리밍 모드 Transformer rolling context 길이 (프레임 수)
+STREAMING_CONTEXT = BUFFER_SIZE
+# 10-2) 스트리밍 모드는 프레임마다 판단하므로 연속 n 프레임 양성일 때 이벤트
+STREAMING_DECISION_WINDOW = 4
+# 10-3) 움직임 게이트로 이 시간(초) 넘게 step 을 건너뛰면 GRU hidden state 초기화 (프레임마다 이어지는 recurrence 가 끊겼으므로)
+STREAMING_MAX_SKIP = 2.0
+
+# 11) 추론 백엔드: "eager" / "torchscript" / "compile" (torch.compile) / "onnx" (ONNX Runtime CPU)
+INFERENCE_BACKEND = "eager"
+# 11-1) ONNX Runtime intra-op 스레드 수 (0 이면 ORT 기본값)
+ORT_INTRA_OP_THREADS = 0
+
+# 12) 추론 정밀도: "fp32" / "int8_dynamic" / "int8_static" / "bf16" (int8/bf16 은 eager 백엔드 전용)
+INFERENCE_PRECISION = "fp32"
+# 12-1) int8_static calibration 용 ROI crop 이미지 폴더 / 사용할 최대 프레임 수
+CALIBRATION_DIR = "calibration"
+CALIBRATION_FRAMES = 256
+
+# 13) 로딩 시 그래프 최적화 (conv+BN 폴딩, channels_last) - 출력은 동일, 체크포인트는 그대로 사용
+OPTIMIZE_GRAPH = True
+
+# 14) 추론용 JPEG 축소 디코딩 (ROI 가 모델 입력보다 충분히 크면 1/2, 1/4, 1/8 스케일로 디코딩)
+REDUCED_DECODE = True
+
+# 15) 움직임 게이트: 움직임 없는 윈도우는 추론 생략 (IDLE_INFERENCE_EVERY 번에 한 번만 추론)
+MOTION_GATE = True
+# 15-1) 차분 계산용 흑백 축소 크기 / 변화 픽셀 기준(0~255) / 변화 픽셀 비율 임계값
+MOTION_GATE_SIZE = 64
+MOTION_PIXEL_DELTA = 12
+MOTION_THRESHOLD = 0.005
+# 15-2) 움직임이 멈춘 뒤에도 계속 추론할 윈도우 수 / 이후 유휴 상태 추론 주기
+MOTION_HOLD_WINDOWS = 2
+IDLE_INFERENCE_EVERY = 4
+
+# 16) StreamFrames(양방향 스트리밍) ack 주기 (n 프레임마다 1회, 실패는 즉시)
+STREAM_ACK_INTERVAL = 20
+
+# 17) gRPC 서버 모드: "thread" (ThreadPoolExecutor) / "aio" (grpc.aio 이벤트 루프 + 전용 executor)
+SERVER_MODE = "thread"
+GRPC_PORT = 6000
+METRICS_PORT = 8000  # Prometheus HTTP endpoint
+# 17-1) thread 모드 워커 수 / 동시 처리 RPC 상한 (None 이면 제한 없음, 초과 시 RESOURCE_EXHAUSTED)
+GRPC_MAX_WORKERS = 10
+GRPC_MAX_CONCURRENT_RPCS = None
+# 17-2) aio 모드: Redis push + JPEG 디코딩 executor / 누적 + 추론 executor 스레드 수
+DECODE_WORKERS = 4
+INFERENCE_WORKERS = 8
+
+# 18) 수신 파이프라인: SendFrame 은 ingest 큐에 넣고 바로 응답, 이후 decode -> window -> inference -> decision 단계로 처리
+#     (False 면 기존처럼 RPC 안에서 디코딩/추론까지 동기 처리)
+INGEST_PIPELINE = True
+PIPELINE_QUEUE_SIZE = 1000      # 단계별 bounded queue 크기 (ingest 큐가 가득 차면 RESOURCE_EXHAUSTED)
+PIPELINE_INGEST_WORKERS = 4     # Redis 원본 프레임 저장
+PIPELINE_DECODE_WORKERS = 4     # JPEG 디코딩 + ROI crop
+PIPELINE_WINDOW_LANES = 4       # 카메라별 ring buffer / 판단 lane 수 (카메라는 serial_number 해시로 lane 1개에 고정)
+PIPELINE_IDLE_INTERVAL = 0.5    # lane 유휴 작업(재정렬 버퍼 flush) 주기 (초)
+
+# 19) 프레임 재정렬 (파이프라인 window 단계): 동시 RPC 로 순서가 뒤바뀐 프레임을 timestamp 순으로 적용
+REORDER_JITTER_MS = 250   # 가장 최근 프레임보다 이만큼(ms) 오래된 프레임부터 적용 (0 이면 재정렬 없이 바로 적용)
+REORDER_MAX_FRAMES = 8    # 카메라별 최대 보류 프레임 수
+REORDER_MAX_HOLD = 1.0    # 새 프레임이 이 시간(초) 동안 없으면 보류 중인 프레임을 모두 적용
+# 이미 적용한 timestamp 보다 이만큼(ms) 넘게 과거인 프레임은 늦은 프레임이 아니라 카메라 시계가 뒤로 간 것(재부팅 / NTP 보정)으로 보고 버퍼 초기화
+REORDER_CLOCK_RESET_MS = min(max(4 * REORDER_JITTER_MS, 1000), MAX_INTER_FRAME_DELAY * 1000)
+
+# 20) 멀티 프로세스 모드: 0 이면 단일 프로세스, N 이면 워커 N 개를 서로 다른 코어 집합에 고정해서 실행
+WORKER_PROCESSES = 0
+# 20-1) 카메라 라우팅: "dispatcher" (메인 프로세스가 serial_number 해시로 전달) / "reuseport" (SO_REUSEPORT 로 커널이 연결 분배)
+WORKER_ROUTING = "dispatcher"
+WORKER_BASE_PORT = 6100       # dispatcher 모드에서 워커 i 의 gRPC 포트 = WORKER_BASE_PORT + i
+WORKER_RESTART_DELAY = 1.0    # 워커 생존 확인 주기 (초), 죽은 워커는 같은 코어 / 포트로 재시작
+
+# 21) 디코딩 프로세스 풀 (파이프라인 decode 단계): JPEG 디코딩 + 224x224 축소를 별도 프로세스에서 수행, 결과는 공유 메모리 슬롯으로 전달
+DECODE_PROCESSES = 2        # 0 이면 decode 단계 스레드에서 직접 디코딩
+DECODE_POOL_SLOTS = 128     # 224x224x3 슬롯 수 (약 147KB x 128 = 18MB), 부족하면 로컬 디코딩으로 대체
+DECODE_POOL_SHM_SHARE = 0.5 # /dev/shm 여유 공간 중 디코딩 풀이 쓸 수 있는 비율 (docker 기본 /dev/shm 은 64MB, 넘겨 쓰면 SIGBUS)
+
+# 22) 수용 제어 (load shedding): 전체 in-flight 프레임 예산, 일부는 낙상 의심 카메라용으로 남겨둠
+ADMISSION_CONTROL = True
+ADMISSION_MAX_INFLIGHT = 800    # 파이프라인에서 아직 ring buffer 에 들어가지 않은 프레임 수 상한 (PIPELINE_QUEUE_SIZE 보다 작게)
+ADMISSION_RESERVED = 0.2        # 예산 중 최근 양성 판단이 있는 카메라만 쓸 수 있는 비율
+ADMISSION_SHED_AGE = 2.0        # 과부하일 때 일반 카메라 프레임이 큐에서 이 시간(초) 이상 기다렸으면 처리하지 않고 버림
+ADMISSION_RETRY_MIN_MS = 250    # 거절 시 retry-after-ms 힌트 범위
+ADMISSION_RETRY_MAX_MS = 5000
+ADMISSION_PRIORITY_WAIT = 0.5   # 낙상 의심 카메라 프레임은 lane 큐가 가득 차도 이 시간(초)까지 기다렸다가 넣음
+
+# 23) 카메라 피드백 (Response / StreamAck 의 CaptureSettings): 평소 EXPECTED_FPS, 움직임 없는 카메라 / 과부하 시 저 fps
+FEEDBACK_IDLE_FPS = 1.0
+FEEDBACK_JPEG_QUALITY = 80
+FEEDBACK_LOW_JPEG_QUALITY = 60          # 과부하 시 (낙상 의심 카메라 제외)
+FEEDBACK_MAX_RESOLUTION = (1280, 720)   # (width, height), 0 이면 제한 없음
+FEEDBACK_LOW_RESOLUTION = (640, 480)
+FEEDBACK_OVERLOAD = 0.7                 # in-flight / ADMISSION_MAX_INFLIGHT 또는 추론 큐 / (MAX_BATCH_SIZE x FEEDBACK_QUEUE_BATCHES) 가 이 비율 이상이면 과부하
+FEEDBACK_QUEUE_BATCHES = 4
+
+# 24) 카메라 상태 레지스트리: 유휴 카메라 제거 + 전체 메모리 예산 (초과 시 가장 오래 전에 활동한 카메라부터 제거)
+CAMERA_IDLE_TTL = 600                    # 이 시간(초) 동안 프레임이 없으면 카메라 상태 제거
+CAMERA_MEMORY_BUDGET = 2 * 1024 ** 3     # 카메라 상태 전체 메모리 상한 (bytes)
+REGISTRY_SWEEP_INTERVAL = 30             # 제거 / 메모리 계산 주기 (초)
+REDIS_MAX_CONNECTIONS = 64               # 공유 Redis 연결 풀 크기
+REDIS_POOL_TIMEOUT = 2.0                 # 연결이 모두 사용 중이면 이 시간(초)까지 반납을 기다림 (넘으면 ConnectionError)
+
+# 25) 클러스터 모드: 여러 server3 노드에 카메라를 consistent hashing 으로 분산 (노드 주소는 환경 변수 CLUSTER_NODE_ADDRESS)
+CLUSTER_MODE = False
+CLUSTER_VNODES = 64                 # 노드당 가상 노드 수
+CLUSTER_HEARTBEAT_INTERVAL = 2.0    # 멤버십 heartbeat / ring 갱신 주기 (초)
+CLUSTER_NODE_TTL = 10.0             # 이 시간(초) 동안 heartbeat 가 없으면 ring 에서 제외
+CLUSTER_HANDOFF_TTL = 60            # 넘겨준 카메라 상태를 Redis 에 보관하는 시간 (초)
+
+# 26) 원본 프레임 보관소 (알림 영상용): "stream" (Redis Streams, timestamp ID + XRANGE, Redis 7.0 이상) / "list" (기존 pickle + Redis list)
+#     / "shm" (단일 노드: 카메라별 공유 메모리 ring, Redis 사용 안 함)
+FRAME_STORE = "stream"
+FRAME_STORE_SHM_DIR = "/dev/shm/eldereye-frames"    # shm: 카메라별 ring 파일 위치 (tmpfs 가 아니면 일반 mmap 파일)
+# 26-1) write-behind: 프레임 저장을 SendFrame 에서 분리, 모든 카메라 프레임을 모아 pipeline 1번으로 저장
+FRAME_STORE_WRITE_BEHIND = True
+FRAME_STORE_FLUSH_INTERVAL = 0.005   # flush 주기 (초)
+FRAME_STORE_FLUSH_BATCH = 256        # 이만큼 쌓이면 주기를 기다리지 않고 flush (pipeline 1번 최대 프레임 수)
+FRAME_STORE_BUFFER = 4096            # 저장 대기 버퍼 크기 (가득 차면 가장 오래된 프레임부터 버림)
+
+# 27) 알림 영상 pre-roll 보관 한도 (MAX_QUEUE_LEN 은 카메라당 최대 프레임 수로만 사용)
+#     시간: SAVE_DURATION + 판단 지연 여유 / 용량: 카메라별 예산, 전체 예산 (카메라 수로 나눈 값이 더 작으면 그 값)
+FRAME_STORE_HORIZON = SAVE_DURATION + 4
+FRAME_STORE_CAMERA_BYTES = 8 * 1024 ** 2    # shm 보관소는 이 크기로 카메라별 ring 을 만듦 (생성 시 tmpfs 공간을 미리 할당)
+FRAME_STORE_TOTAL_BYTES = 1024 ** 3
+# 27-1) cold tier: 최근 FRAME_STORE_HOT_WINDOW 초만 원본으로 보관, 그보다 오래된 pre-roll 은 축소 / 저화질 사본으로 보관
+#       (hot 에서 밀려나기 직전에 축소 사본으로 옮겨 두고, 알림 영상 앞부분은 원래 크기로 다시 키워서 사용)
+FRAME_STORE_COLD_TIER = False
+FRAME_STORE_HOT_WINDOW = 3
+FRAME_STORE_COLD_REDUCE = 2                 # JPEG DCT 축소 디코딩 배율 (2 / 4 / 8)
+FRAME_STORE_COLD_QUALITY = 60
+FRAME_STORE_DEMOTE_INTERVAL = 0.5           # hot 에서 밀려날 프레임을 cold 사본으로 옮기는 주기 (초), 이만큼 일찍 옮겨 두 tier 사이 빈틈 방지
+
+# 28) 카메라 판단 상태 snapshot (재시작 후 warm start): "redis" / "disk" / "" (사용 안 함)
+SNAPSHOT_BACKEND = "redis"
+SNAPSHOT_INTERVAL = 5.0             # 저장 주기 (초), 그 사이 프레임을 받은 카메라만 저장
+SNAPSHOT_DIR = "snapshots"          # disk 백엔드 저장 위치
+SNAPSHOT_TTL = COOLDOWN_PERIOD * 2  # 이보다 오래된 snapshot 은 사용 안 함 (쿨다운이 이미 끝났음)
+SNAPSHOT_MAX_AGE = 30               # 이 시간(초) 안에 저장된 snapshot 만 프레임 / 추론 상태까지 복원 (그 외는 쿨다운만)
+SNAPSHOT_JPEG_QUALITY = 90          # snapshot 안 224x224 프레임 압축 화질
+SHUTDOWN_GRACE = 3.0                # SIGTERM 후 진행 중인 RPC 를 기다리는 시간 (초), 이후 마지막 snapshot / 클러스터 탈퇴
@@ -0,0 +1,86 @@
+# app/decode.py
+# [설명] : 추론용 JPEG 축소 디코딩 (ROI 가 모델 입력보다 충분히 크면 1/2, 1/4, 1/8 스케일로 디코딩)
+#   - libjpeg 의 DCT 스케일링(IMREAD_REDUCED_COLOR_N)을 쓰므로 전체 디코딩 후 축소보다 훨씬 저렴
+#   - 알림 영상 저장(dispatcher.get_frames_in_range)은 기존처럼 원본 해상도로 디코딩
+import struct
+import numpy as np
+import cv2
+
+REDUCED_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+
+# SOF 마커 (baseline / progressive / lossless 등, DHT/JPG/DAC 제외)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def jpeg_size(data):
+    # JPEG 헤더에서 (width, height) 만 읽음 - 디코딩 없이. JPEG 가 아니거나 깨졌으면 None
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    n = len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # 길이 없는 마커
+            i += 2
+            continue
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        if marker in SOF_MARKERS:
+            if i + 9 > n:
+                return None
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+def decode_scale(frame_w, frame_h, roi_w, roi_h, target):
+    # ROI 가 스케일 후에도 target 이상인 가장 큰 축소 비율 (1 이면 원본 디코딩)
+    w, h = (roi_w, roi_h) if roi_w > 0 and roi_h > 0 else (frame_w, frame_h)
+    for scale in (8, 4, 2):
+        if w // scale >= target and h // scale >= target:
+            return scale
+    return 1
+
+def roi_in_frame(roi_x, roi_y, roi_w, roi_h, frame_w, frame_h):
+    # ROI 가 있고 원본 해상도 안에 들어오면 True (아니면 전체 프레임 사용)
+    return roi_w > 0 and roi_h > 0 and roi_x >= 0 and roi_y >= 0 and roi_x + roi_w <= frame_w and roi_y + roi_h <= frame_h
+
+def decode_roi(frame_bytes, roi_x, roi_y, roi_w, roi_h, target, reduced=True):
+    np_frame = np.frombuffer(frame_bytes, dtype=np.uint8)
+    size = jpeg_size(frame_bytes) if reduced else None
+
+    # ROI 유효성을 먼저 판단하고, 실제로 쓸 영역(ROI 또는 전체 프레임) 기준으로 축소 배율 결정
+    scale = 1
+    use_roi = None
+    if size is not None:
+        use_roi = roi_in_frame(roi_x, roi_y, roi_w, roi_h, *size)
+        region_w, region_h = (roi_w, roi_h) if use_roi else size
+        scale = decode_scale(size[0], size[1], region_w, region_h, target)
+
+    frame = cv2.imdecode(np_frame, REDUCED_FLAGS.get(scale, cv2.IMREAD_COLOR))
+    if frame is None:
+        raise ValueError("cv2.imdecode failed: frame is None")
+
+    if use_roi is None:  # 헤더를 읽지 않았으면 (축소 디코딩 안 함) 디코딩한 원본 크기로 판단
+        use_roi = roi_in_frame(roi_x, roi_y, roi_w, roi_h, frame.shape[1], frame.shape[0])
+    if use_roi:
+        # 좌표는 디코딩 스케일로 변환
+        x, y = roi_x // scale, roi_y // scale
+        w, h = max(roi_w // scale, 1), max(roi_h // scale, 1)
+        frame = frame[y:y+h, x:x+w]
+
+    return frame
+
+def resize_to(frame, size, out=None):
+    # BGR 그대로 size x size 로 축소 (축소는 INTER_AREA 가 PIL bilinear(antialias) 에 가장 가까움)
+    # out 을 주면 (예: ring buffer / 공유 메모리 슬롯) 새 배열 할당 없이 그 위치에 바로 기록
+    h, w = frame.shape[:2]
+    interpolation = cv2.INTER_AREA if h >= size and w >= size else cv2.INTER_LINEAR
+    return cv2.resize(frame, (size, size), dst=out, interpolation=interpolation)
@@ -0,0 +1,133 @@
+# app/decode_pool.py
+# [설명] : JPEG 디코딩 + ROI crop + 224x224 축소를 별도 프로세스 풀에서 수행
+#   - 결과는 공유 메모리(multiprocessing.shared_memory) 슬롯 [slots, 224, 224, 3] uint8 에 바로 기록
+#   - 추론 프로세스는 슬롯 번호만 돌려받아 numpy view 로 읽음 (이미지 배열 pickle / 복사 없음)
+#   - 빈 슬롯이 없으면 기다리지 않고 현재 프로세스에서 디코딩 (재정렬 버퍼가 슬롯을 잡고 있어도 막히지 않도록)
+#   - 슬롯 수는 /dev/shm 여유 공간(statvfs)에 맞춰 줄임 (tmpfs 용량을 넘는 페이지에 쓰면 예외가 아니라 SIGBUS)
+#   - 워커가 죽어 풀이 깨지면 그 프레임은 현재 프로세스에서 디코딩하고 풀을 새로 띄움
+import os
+import sys
+import errno
+import logging
+import threading
+import contextlib
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+import decode_worker
+from decode import decode_roi, resize_to
+from monitoring import DECODE_POOL_FREE_SLOTS, DECODE_POOL_FALLBACK
+from constants import DECODE_PROCESSES, DECODE_POOL_SLOTS, DECODE_POOL_SHM_SHARE, REDUCED_DECODE
+
+logger = logging.getLogger(__name__)
+
+SHM_DIR = "/dev/shm"  # multiprocessing.shared_memory 가 만드는 POSIX 공유 메모리 위치 (Linux)
+
+def fit_slots(slots, slot_bytes, share=DECODE_POOL_SHM_SHARE, directory=SHM_DIR):
+    # /dev/shm 여유 공간의 share 비율 안에 들어가는 슬롯 수 (요청보다 많이 주지는 않음)
+    stat = os.statvfs(directory)
+    return min(slots, int(stat.f_bavail * stat.f_frsize * share) // slot_bytes)
+
+@contextlib.contextmanager
+def _without_main():
+    # spawn 은 자식에서 __main__(main.py) 을 다시 import 하므로 (torch / grpc / 모델 로딩) 워커 기동 동안만 숨김
+    #   - 워커 진입점은 decode_worker 에 있으므로 자식은 __main__ 이 필요 없음
+    main = sys.modules["__main__"]
+    saved = {attr: main.__dict__[attr] for attr in ("__file__", "__spec__") if attr in main.__dict__}
+    main.__dict__.pop("__file__", None)
+    main.__spec__ = None
+    try:
+        yield
+    finally:
+        main.__dict__.update(saved)
+
+class DecodePool:
+    """
+    - decode(...) -> (frame, slot) : frame 은 공유 메모리 슬롯 view (slot 이 None 이면 로컬 디코딩한 일반 배열)
+    - 사용이 끝난 슬롯은 release(slot) 으로 반납 (FrameAccumulator ring buffer 로 복사한 직후)
+    """
+    def __init__(self, size, processes=DECODE_PROCESSES, slots=DECODE_POOL_SLOTS):
+        self.size = size
+        fitted = fit_slots(slots, size * size * 3)
+        if fitted < processes:
+            raise OSError(errno.ENOSPC, f"Not enough space in {SHM_DIR} for decode pool slots (fits {fitted})")
+        if fitted < slots:
+            logger.warning(f"Decode pool slots reduced {slots} -> {fitted} to fit free space in {SHM_DIR}")
+            slots = fitted
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * size * size * 3)
+        self.frames = np.ndarray((slots, size, size, 3), dtype=np.uint8, buffer=self.shm.buf)
+        self.free = queue.SimpleQueue()
+        for slot in range(slots):
+            self.free.put(slot)
+        DECODE_POOL_FREE_SLOTS.set(slots)
+        self.processes = processes
+        self.slots = slots
+        self.lock = threading.Lock()
+        self.executor = self._start()
+        logger.info(f"Decode pool: {processes} processes, {slots} shared-memory slots ({self.shm.size / 2**20:.1f} MiB)")
+
+    def _start(self):
+        executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=decode_worker.attach,
+            initargs=(self.shm.name, self.slots, self.size)
+        )
+        # 워커마다 no-op 을 하나씩 넣어 미리 기동 (첫 프레임들이 프로세스 spawn / import 를 기다리지 않도록)
+        with _without_main():
+            ready = [executor.submit(decode_worker.ready) for _ in range(self.processes)]
+            for future in ready:
+                future.result()
+        return executor
+
+    def _restart(self, broken):
+        # 워커가 죽으면(OOM kill 등) 풀 전체가 BrokenProcessPool 이 되므로 새 풀로 교체 (동시에 실패한 스레드 중 한 번만)
+        with self.lock:
+            if self.executor is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            try:
+                self.executor = self._start()
+            except BrokenProcessPool as e:
+                logger.error(f"Decode pool restart failed: {e}")
+                return
+        logger.warning("Decode pool restarted after a worker process died")
+
+    def _decode_local(self, frame_bytes, roi_x, roi_y, roi_w, roi_h, reason):
+        DECODE_POOL_FALLBACK.labels(reason=reason).inc()
+        frame = decode_roi(frame_bytes, roi_x, roi_y, roi_w, roi_h, target=self.size, reduced=REDUCED_DECODE)
+        return resize_to(frame, self.size), None
+
+    def decode(self, frame_bytes, roi_x, roi_y, roi_w, roi_h):
+        try:
+            slot = self.free.get_nowait()
+        except queue.Empty:
+            return self._decode_local(frame_bytes, roi_x, roi_y, roi_w, roi_h, "no_slot")
+        DECODE_POOL_FREE_SLOTS.set(self.free.qsize())
+
+        executor = self.executor
+        try:
+            executor.submit(decode_worker.decode_into, slot, frame_bytes, roi_x, roi_y, roi_w, roi_h, REDUCED_DECODE).result()
+        except BrokenProcessPool:
+            self.release(slot)
+            self._restart(executor)
+            return self._decode_local(frame_bytes, roi_x, roi_y, roi_w, roi_h, "pool_broken")
+        except Exception:
+            self.release(slot)
+            raise
+        return self.frames[slot], slot
+
+    def release(self, slot):
+        if slot is None:
+            return
+        self.free.put(slot)
+        DECODE_POOL_FREE_SLOTS.set(self.free.qsize())
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        del self.frames
+        self.shm.close()
+        self.shm.unlink()
@@ -0,0 +1,30 @@
+# app/decode_worker.py
+# [설명] : 디코딩 프로세스 풀(DecodePool) 워커 진입점
+#   - spawn 된 자식은 이 모듈만 import 하도록 numpy / cv2 / decode 외에는 import 하지 않음 (torch / grpc / prometheus 로딩 없음)
+#   - 공유 메모리는 initializer(attach) 에서 한 번만 붙이고, 결과는 슬롯에 바로 기록
+import numpy as np
+import cv2
+from multiprocessing import shared_memory
+from decode import decode_roi, resize_to
+
+# 디코딩 프로세스 전역 상태 (initializer 에서 공유 메모리에 attach)
+_shm = None
+_frames = None
+_size = None
+
+def attach(name, slots, size):
+    global _shm, _frames, _size
+    cv2.setNumThreads(1)
+    # spawn 된 워커는 추론 프로세스의 resource_tracker 를 같이 쓰므로 unlink 는 생성한 쪽(DecodePool.close)만 수행
+    _shm = shared_memory.SharedMemory(name=name)
+    _frames = np.ndarray((slots, size, size, 3), dtype=np.uint8, buffer=_shm.buf)
+    _size = size
+
+def ready():
+    # 워커 기동 확인용 no-op (DecodePool 이 시작 시 워커마다 하나씩 제출)
+    return True
+
+def decode_into(slot, frame_bytes, roi_x, roi_y, roi_w, roi_h, reduced):
+    frame = decode_roi(frame_bytes, roi_x, roi_y, roi_w, roi_h, target=_size, reduced=reduced)
+    resize_to(frame, _size, out=_frames[slot])
+    return slot
@@ -8,7 +8,14 @@ import cv2
 from models.model import CNNAE_LSTM_Transformer
 from monitoring import INFERENCE_DURATION, INFERENCE_REQUESTS
 import logging
+import threading
+from collections import deque
 from gradcam import GradCAM, overlay_cam_on_image
+from feature_cache import LatentCache
+from decode import resize_to
+from constants import STREAMING_CONTEXT, INFERENCE_BACKEND, INFERENCE_PRECISION, CALIBRATION_DIR, CALIBRATION_FRAMES
+from backends import build_backend
+from precision import apply_precision, load_calibration_frames
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
@@ -19,33 +26,93 @@ formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 ch.setFormatter(formatter)
 logger.addHandler(ch)
 
+# 모델 입력 크기 / ImageNet 정규화 값 (RGB 순서)
+INPUT_SIZE = 224
+MEAN = (0.485, 0.456, 0.406)
+STD = (0.229, 0.224, 0.225)
+PREPROCESS_BUFFERS_PER_SIZE = 4  # 프레임 수별로 보관할 전처리 텐서 최대 개수 (스케줄러 대기 윈도우 수 정도)
+
+def load_model(model_path, device):
+    model = CNNAE_LSTM_Transformer(
+        ae_latent_dim=128,
+        gru_hidden_dim=256,
+        lstm_num_layers=2,
+        transformer_d_model=256,
+        transformer_nhead=4,
+        transformer_num_layers=1,
+        num_classes=2,
+        cnn_feature_dim=256
+    ).to(device)
+
+    model.load_state_dict(torch.load(model_path, map_location=device), strict=False)
+    model.eval()
+    return model
+
+class PendingWindow:
+    """
+    배치 추론 대기 중인 윈도우 1개
+    - latents[i] : 캐시에서 찾은 프레임 latent (없으면 None)
+    - new_frames : latents 가 None 인 위치(missing)의 전처리 텐서 [n, C, H, W]
+    """
+    def __init__(self, serial_number, timestamps, latents, missing, new_frames):
+        self.serial_number = serial_number
+        self.timestamps = timestamps
+        self.latents = latents
+        self.missing = missing
+        self.new_frames = new_frames
+
+class PendingStep:
+    """
+    스트리밍 추론 대기 중인 프레임 1개 (전처리 텐서 [C, H, W])
+    """
+    def __init__(self, serial_number, timestamp, frame):
+        self.serial_number = serial_number
+        self.timestamp = timestamp
+        self.frame = frame
+
+class StreamState:
+    """
+    카메라별 스트리밍 상태
+    - hidden  : GRU hidden state [num_layers, 1, gru_hidden_dim]
+    - context : Transformer 입력용 최근 GRU 출력 (rolling context)
+    """
+    def __init__(self, context_len):
+        self.hidden = None
+        self.context = deque(maxlen=context_len)
+
 class InferenceEngine:
-    def __init__(self, model_path, device='cpu', buffer_size=10):
+    def __init__(self, model_path, device='cpu', buffer_size=10, backend=INFERENCE_BACKEND, precision=INFERENCE_PRECISION,
+                 calibration_dir=CALIBRATION_DIR):
         self.device = torch.device(device)
         self.buffer_size = buffer_size
 
         # 모델 로딩
-        self.model = CNNAE_LSTM_Transformer(
-            ae_latent_dim=128,
-            gru_hidden_dim=256,
-            lstm_num_layers=2,
-            transformer_d_model=256,
-            transformer_nhead=4,
-            transformer_num_layers=1,
-            num_classes=2,
-            cnn_feature_dim=256
-        ).to(self.device)
-
-        self.model.load_state_dict(torch.load(model_path, map_location=self.device), strict=False)
-        self.model.eval()
-
-        self.gradcam = GradCAM(self.model.cnn, target_layer_name="conv2")
+        self.model = load_model(model_path, self.device)
 
         self.transform = transforms.Compose([
-            transforms.Resize((224, 224)),
+            transforms.Resize((INPUT_SIZE, INPUT_SIZE)),
             transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+            transforms.Normalize(mean=list(MEAN), std=list(STD))
         ])
+        # 벡터화 전처리용: BGR uint8 -> RGB 정규화를 x * scale + shift 한 번으로 처리
+        # (출력 채널 c(RGB) 는 입력 채널 2 - c(BGR) 에서 가져옴)
+        std = torch.tensor(STD).view(1, 3, 1, 1)
+        self.norm_scale = 1.0 / (255.0 * std)
+        self.norm_shift = -torch.tensor(MEAN).view(1, 3, 1, 1) / std
+
+        # 서버 추론 경로는 logits 전용 그래프만 사용 (GradCAM 은 eager 모델 사용)
+        self.backend = build_backend(backend, self.model, model_path, buffer_size)
+        calibration_frames = None
+        if precision == "int8_static":
+            calibration_frames = load_calibration_frames(calibration_dir, self.preprocess_batch, CALIBRATION_FRAMES)
+        self.backend = apply_precision(self.backend, precision, calibration_frames)
+
+        self.gradcam = GradCAM(self.model.cnn, target_layer_name="conv2")
+        self.latent_cache = LatentCache(capacity=buffer_size)
+        self.stream_states = {}
+        self.stream_lock = threading.Lock()
+        self.batch_buffers = {}  # 프레임 수 -> 재사용할 [N, 3, 224, 224] 전처리 텐서 목록 (prepare_window 결과용)
+        self.buffer_lock = threading.Lock()
 
     def preprocess(self, frame):
         if not isinstance(frame, np.ndarray):
@@ -54,11 +121,39 @@ class InferenceEngine:
         pil = Image.fromarray(rgb)
         return self.transform(pil)
 
+    def resize_frame(self, frame, out=None):
+        # BGR 그대로 224x224 로 축소, out 을 주면 (예: FrameAccumulator ring buffer 슬롯) 그 위치에 바로 기록
+        if not isinstance(frame, np.ndarray):
+            raise ValueError(f"Invalid frame type: {type(frame)}")
+        if out is not None and frame.shape == out.shape:
+            # 디코딩 풀이 이미 224x224 로 줄여 둔 프레임 (공유 메모리 슬롯) -> 복사만
+            np.copyto(out, frame)
+            return out
+        return resize_to(frame, INPUT_SIZE, out=out)
+
+    def normalize_batch(self, resized, out=None):
+        # resized: [N, 224, 224, 3] uint8 BGR -> [N, 3, 224, 224] float32 RGB 정규화 (channels_last)
+        # 채널 뒤집기 + 스케일 + 정규화를 한 번의 벡터 연산으로 out 텐서에 직접 기록
+        x = torch.from_numpy(resized).permute(0, 3, 1, 2)[:, [2, 1, 0]]
+        if out is None:
+            out = torch.empty(x.shape, dtype=torch.float32, memory_format=torch.channels_last)
+        torch.mul(x, self.norm_scale, out=out)
+        return out.add_(self.norm_shift)
+
+    def preprocess_batch(self, frames, out=None):
+        # frames: 원본 크기 BGR 프레임 리스트, 또는 이미 축소된 [N, 224, 224, 3] uint8 배열 (ring buffer 윈도우)
+        if isinstance(frames, np.ndarray) and frames.shape[1:] == (INPUT_SIZE, INPUT_SIZE, 3):
+            return self.normalize_batch(frames, out=out)
+        resized = np.empty((len(frames), INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)
+        for i, frame in enumerate(frames):
+            self.resize_frame(frame, out=resized[i])
+        return self.normalize_batch(resized, out=out)
+
     def run_batch_inference_with_cam(self, frames):
         if len(frames) < self.buffer_size:
             return None, None
         
-        tensor_seq = torch.stack([self.preprocess(f) for f in frames[-self.buffer_size:]]).unsqueeze(0).to(self.device)
+        tensor_seq = self.preprocess_batch(frames[-self.buffer_size:]).contiguous().unsqueeze(0).to(self.device)
         
         with torch.no_grad():
             logits, _, _ = self.model(tensor_seq)
@@ -81,12 +176,161 @@ class InferenceEngine:
             overlays.append(overlay)
         return overlays
     
+    def prepare_window(self, serial_number, frames, timestamps=None):
+        # 캐시에 없는 프레임만 전처리 (serial_number/timestamps 가 없으면 캐시 미사용)
+        frames = frames[-self.buffer_size:]
+        latents = [None] * len(frames)
+        use_cache = (
+            serial_number is not None and timestamps is not None
+            and len(set(timestamps[-self.buffer_size:])) == len(frames)
+        )
+        if use_cache:
+            timestamps = list(timestamps[-self.buffer_size:])
+            cached = self.latent_cache.lookup(serial_number, timestamps)
+            latents = [cached.get(ts) for ts in timestamps]
+        else:
+            serial_number, timestamps = None, None
+
+        missing = [i for i, latent in enumerate(latents) if latent is None]
+        new_frames = None
+        if missing:
+            new_frames = self.preprocess_batch(frames[missing] if isinstance(frames, np.ndarray) else [frames[i] for i in missing],
+                                               out=self._batch_buffer(len(missing)))
+        return PendingWindow(serial_number, timestamps, latents, missing, new_frames)
+
+    def _batch_buffer(self, n):
+        # 전처리 결과 텐서를 매번 새로 할당하지 않고 재사용 (여러 윈도우가 스케줄러에서 대기하므로 크기별 free list)
+        with self.buffer_lock:
+            free = self.batch_buffers.get(n)
+            if free:
+                return free.pop()
+        return torch.empty((n, 3, INPUT_SIZE, INPUT_SIZE), dtype=torch.float32, memory_format=torch.channels_last)
+
+    def _release_buffers(self, tensors):
+        with self.buffer_lock:
+            for tensor in tensors:
+                free = self.batch_buffers.setdefault(len(tensor), [])
+                if len(free) < PREPROCESS_BUFFERS_PER_SIZE:
+                    free.append(tensor)
+
     @INFERENCE_DURATION.time()
-    def run_batch_inference(self, frames):
+    def infer_windows(self, windows):
+        # 1) 모든 윈도우의 신규 프레임을 모아 CNN + ae_encoder 한 번만 실행
+        # 2) 캐시된 latent 와 합쳐 [B, seq, latent] 로 GRU/Transformer 실행
+        with torch.inference_mode():
+            new_frames = [w.new_frames for w in windows if w.new_frames is not None]
+            if new_frames:
+                batch = torch.cat(new_frames)
+                self._release_buffers(new_frames)  # torch.cat 이 복사했으므로 바로 반납
+                new_latents = self.backend.encode(batch.to(self.device))
+
+            latent_seqs = []
+            offset = 0
+            for w in windows:
+                latents = list(w.latents)
+                if w.missing:
+                    fresh = new_latents[offset:offset + len(w.missing)]
+                    offset += len(w.missing)
+                    for i, latent in zip(w.missing, fresh):
+                        latents[i] = latent
+                    if w.serial_number is not None:
+                        self.latent_cache.store(w.serial_number, [w.timestamps[i] for i in w.missing], fresh)
+                latent_seqs.append(torch.stack(latents))
+
+            return self.backend.classify(torch.stack(latent_seqs))
+
+    def run_window(self, serial_number, frames, timestamps):
         INFERENCE_REQUESTS.inc()
         if len(frames) < self.buffer_size:
             return None
-        tensor_seq = torch.stack([self.preprocess(f) for f in frames[-self.buffer_size:]]).unsqueeze(0).to(self.device)
-        with torch.no_grad():
-            logits, _, _ = self.model(tensor_seq)
-        return logits
\ No newline at end of file
+        return self.infer_windows([self.prepare_window(serial_number, frames, timestamps)])
+
+    def run_batch_inference(self, frames):
+        return self.run_window(None, frames, None)
+
+    def prepare_step(self, serial_number, frame, timestamp):
+        return PendingStep(serial_number, timestamp, self.preprocess_batch([frame])[0])
+
+    def reset_stream(self, serial_number):
+        with self.stream_lock:
+            self.stream_states.pop(serial_number, None)
+
+    def export_stream(self, serial_number):
+        # 스트리밍 상태 (hidden, [context]) 복사본, 없으면 None (snapshot 용)
+        with self.stream_lock:
+            state = self.stream_states.get(serial_number)
+            if state is None or state.hidden is None:
+                return None
+            return state.hidden.clone(), [t.clone() for t in state.context]
+
+    def restore_stream(self, serial_number, hidden, context):
+        state = StreamState(STREAMING_CONTEXT)
+        state.hidden = hidden.to(self.device)
+        state.context.extend(t.to(self.device) for t in context)
+        with self.stream_lock:
+            self.stream_states[serial_number] = state
+
+    def state_nbytes(self, serial_number):
+        # 카메라별로 들고 있는 latent 캐시 + 스트리밍 상태 크기 (CameraRegistry 메모리 계산용)
+        nbytes = self.latent_cache.nbytes(serial_number)
+        with self.stream_lock:
+            state = self.stream_states.get(serial_number)
+        if state is not None:
+            tensors = list(state.context) + ([state.hidden] if state.hidden is not None else [])
+            nbytes += sum(t.element_size() * t.nelement() for t in tensors)
+        return nbytes
+
+    def _stream_state(self, serial_number):
+        with self.stream_lock:
+            state = self.stream_states.get(serial_number)
+            if state is None:
+                state = self.stream_states[serial_number] = StreamState(STREAMING_CONTEXT)
+            return state
+
+    @INFERENCE_DURATION.time()
+    def infer_steps(self, steps):
+        # 같은 카메라 프레임이 한 배치에 두 개 이상이면 hidden state 순서를 지키도록 라운드로 나눔
+        rounds = []
+        for i, step in enumerate(steps):
+            for r in rounds:
+                if step.serial_number not in r:
+                    r[step.serial_number] = i
+                    break
+            else:
+                rounds.append({step.serial_number: i})
+
+        logits = [None] * len(steps)
+        with torch.inference_mode():
+            latents = self.backend.encode(torch.stack([s.frame for s in steps]).to(self.device))
+            for r in rounds:
+                for i, out in zip(r.values(), self._step_round([steps[i] for i in r.values()], latents[list(r.values())])):
+                    logits[i] = out
+        return torch.cat(logits)
+
+    def _step_round(self, steps, latents):
+        gru = self.model.gru
+        states = [self._stream_state(s.serial_number) for s in steps]
+        zeros = torch.zeros(gru.num_layers, 1, gru.hidden_size, device=self.device)
+        hidden = torch.cat([st.hidden if st.hidden is not None else zeros for st in states], dim=1)
+
+        gru_out, hidden = self.model.step(latents.unsqueeze(1), hidden)
+        for i, st in enumerate(states):
+            st.hidden = hidden[:, i:i + 1].contiguous()
+            st.context.append(gru_out[i, 0])
+
+        # context 길이가 같은 카메라끼리 묶어 Transformer 실행 (대부분 STREAMING_CONTEXT 로 동일)
+        groups = {}
+        for i, st in enumerate(states):
+            groups.setdefault(len(st.context), []).append(i)
+
+        outputs = [None] * len(steps)
+        for idx in groups.values():
+            ctx = torch.stack([torch.stack(list(states[i].context)) for i in idx])
+            out = self.model.head(ctx)
+            for j, i in enumerate(idx):
+                outputs[i] = out[j:j + 1]
+        return outputs
+
+    def run_step(self, serial_number, frame, timestamp):
+        INFERENCE_REQUESTS.inc()
+        return self.infer_steps([self.prepare_step(serial_number, frame, timestamp)])
\ No newline at end of file
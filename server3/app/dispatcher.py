@@ -1,13 +1,28 @@
 # app/dispatcher.py
 # [설명] : Redis Queue에 프레임 저장 [FIFO]
-import redis
-import pickle
+#   - 저장 방식은 FRAME_STORE (frame_store.py: Redis list / Redis Streams / 공유 메모리 ring)
+#   - FRAME_STORE_COLD_TIER: 원본은 최근 FRAME_STORE_HOT_WINDOW 초만, 축소 / 저화질 사본은 FRAME_STORE_HORIZON 까지 보관
+#     (축소 사본은 수신 시점이 아니라 hot 에서 밀려날 때 만듦 -> 수신 경로에 재인코딩 비용 없음)
+import struct
 import threading
 import logging
+from collections import deque
+import redis
 import numpy as np
 import cv2
-from monitoring import REDIS_QUEUE_LENGTH, REDIS_QUEUE_PUSH_DURATION
-from constants import REDIS_HOST, REDIS_PORT, MAX_QUEUE_LEN, EXPECTED_FPS 
+from monitoring import (
+    REDIS_QUEUE_LENGTH, REDIS_QUEUE_PUSH_DURATION,
+    FRAME_STORE_FLUSH_SIZE, FRAME_STORE_FLUSH_DURATION, FRAME_STORE_PENDING, FRAME_STORE_DROPPED
+)
+from constants import (
+    MAX_QUEUE_LEN, EXPECTED_FPS, FRAME_STORE,
+    FRAME_STORE_WRITE_BEHIND, FRAME_STORE_FLUSH_INTERVAL, FRAME_STORE_FLUSH_BATCH, FRAME_STORE_BUFFER,
+    FRAME_STORE_COLD_TIER, FRAME_STORE_HOT_WINDOW, FRAME_STORE_COLD_REDUCE, FRAME_STORE_COLD_QUALITY,
+    FRAME_STORE_DEMOTE_INTERVAL
+)
+from frame_store import Retention, build_frame_store
+from decode import REDUCED_FLAGS, jpeg_size
+from protos import streaming_pb2
 import time
 
 # 로깅 설정
@@ -19,67 +34,183 @@ formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 ch.setFormatter(formatter)
 logger.addHandler(ch)
 
+# cold 사본 JPEG 에 원본 (width, height) 를 COM 세그먼트로 기록 (원본이 축소 배율로 나누어떨어지지 않으면
+# 축소 크기 x 배율이 원본과 달라지고, 알림 영상 VideoWriter 는 첫 프레임과 크기가 다른 프레임을 버림)
+COLD_SIZE_TAG = b"eldereye-size"
+COLD_SIZE = struct.Struct(">HH")
+
+def cold_copy(frame_message):
+    # cold tier 사본: JPEG DCT 축소 디코딩 -> 저화질 재인코딩 (ROI 좌표는 원본 기준 그대로)
+    frame = cv2.imdecode(np.frombuffer(frame_message.image, dtype=np.uint8), REDUCED_FLAGS[FRAME_STORE_COLD_REDUCE])
+    _, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, FRAME_STORE_COLD_QUALITY])
+    size = jpeg_size(frame_message.image) or (frame.shape[1] * FRAME_STORE_COLD_REDUCE, frame.shape[0] * FRAME_STORE_COLD_REDUCE)
+    payload = COLD_SIZE_TAG + COLD_SIZE.pack(*size)
+    jpeg = jpeg.tobytes()
+    copy = streaming_pb2.FrameMessage()
+    copy.CopyFrom(frame_message)
+    copy.image = jpeg[:2] + b"\xff\xfe" + struct.pack(">H", len(payload) + 2) + payload + jpeg[2:]  # SOI 바로 뒤
+    return copy
+
+def cold_size(jpeg, frame):
+    # cold 사본의 원본 (width, height): COM 세그먼트가 없으면 (이전 버전 사본) 축소 배율로 추정
+    start = 6 + len(COLD_SIZE_TAG)
+    if jpeg[2:4] == b"\xff\xfe" and jpeg[6:start] == COLD_SIZE_TAG:
+        return COLD_SIZE.unpack(jpeg[start:start + COLD_SIZE.size])
+    return frame.shape[1] * FRAME_STORE_COLD_REDUCE, frame.shape[0] * FRAME_STORE_COLD_REDUCE
+
 class Dispatcher:
+    """
+    - add_to_queue : Redis 보관소이고 FRAME_STORE_WRITE_BEHIND 이면 버퍼에 넣고 바로 반환 (Redis 대기 없음),
+                     flusher 스레드가 FRAME_STORE_FLUSH_INTERVAL 마다 또는 FRAME_STORE_FLUSH_BATCH 개가 쌓이면
+                     모든 카메라 프레임을 pipeline 1번으로 저장
+    - 버퍼(deque maxlen)가 가득 차면 가장 오래된 프레임부터 버림 (append / popleft 는 lock 없이 thread-safe)
+    - flush 지연(수 ms)은 추론 지연보다 짧으므로 알림 구간 조회(get_frames_in_range)에는 영향 없음
+    - cold tier: 저장한 프레임을 도착 순서대로 들고 있다가, demoter 스레드가 hot window 를 넘기기 직전에
+                 축소 / 저화질 사본으로 만들어 cold 보관소에 저장
+    """
     def __init__(self):
-        self.redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
-        self.lock = threading.Lock()
         self.max_queue_len = MAX_QUEUE_LEN
+        self.cold_store = None
+        if FRAME_STORE_COLD_TIER:
+            self.store = build_frame_store(FRAME_STORE, Retention("hot", horizon=FRAME_STORE_HOT_WINDOW))
+            self.cold_store = build_frame_store(FRAME_STORE, Retention("cold"), namespace="cold")
+        else:
+            self.store = build_frame_store(FRAME_STORE, Retention("hot"))
+
+        if self.cold_store is not None:
+            self.aging = deque()   # (저장 시각 monotonic, serial_number, frame_message), 도착 순서
+            self.forgotten = {}    # serial_number -> 제거 시각 (그 전에 들어온 프레임은 cold 로 옮기지 않음)
+            self.demoter = threading.Thread(target=self._run_demote, name="frame-store-demoter", daemon=True)
+            self.demoter.start()
+
+        self.pending = None
+        if FRAME_STORE_WRITE_BEHIND and self.store.remote:
+            self.pending = deque(maxlen=FRAME_STORE_BUFFER)
+            self.wakeup = threading.Event()
+            self.flush_lock = threading.Lock()  # flusher 스레드와 종료 시 flush() 가 겹치지 않도록 (카메라별 저장 순서 / last_ms 유지)
+            self.flusher = threading.Thread(target=self._run, name="frame-store-flusher", daemon=True)
+            self.flusher.start()
 
     @REDIS_QUEUE_PUSH_DURATION.time()
     def add_to_queue(self, serial_number, frame_message):
-        with self.lock:
-            data = {
-                "timestamp": frame_message.timestamp / 1000,  
-                "frame_id": frame_message.frame_id,
-                "image": frame_message.image,
-                "roi": {
-                    "x": frame_message.roi_x,
-                    "y": frame_message.roi_y,
-                    "w": frame_message.roi_w,
-                    "h": frame_message.roi_h
-                }
-            }
-            key = f"stream:{serial_number}"
-            self.redis.rpush(key, pickle.dumps(data))
-            self.redis.ltrim(key, -self.max_queue_len, -1)
-            REDIS_QUEUE_LENGTH.labels(serial_number=serial_number).set(self.redis.llen(key))
+        if self.pending is None:
+            length = self._write([(serial_number, frame_message)])[serial_number]
+            REDIS_QUEUE_LENGTH.labels(serial_number=serial_number).set(length)
+            return
+
+        if len(self.pending) == self.pending.maxlen:
+            FRAME_STORE_DROPPED.labels(reason="overflow").inc()
+        self.pending.append((serial_number, frame_message))
+        if len(self.pending) >= FRAME_STORE_FLUSH_BATCH:
+            self.wakeup.set()
+
+    def flush(self):
+        # 버퍼가 빌 때까지 FRAME_STORE_FLUSH_BATCH 개씩 저장
+        with self.flush_lock:
+            self._flush()
+
+    def _flush(self):
+        while self.pending:
+            batch = []
+            while self.pending and len(batch) < FRAME_STORE_FLUSH_BATCH:
+                batch.append(self.pending.popleft())
+            FRAME_STORE_PENDING.set(len(self.pending))
+
+            start = time.perf_counter()
+            try:
+                lengths = self._write(batch)
+            except redis.RedisError as e:
+                FRAME_STORE_DROPPED.labels(reason="redis_error").inc(len(batch))
+                logger.warning(f"Frame store flush failed, dropped {len(batch)} frames: {e}")
+                return
+            FRAME_STORE_FLUSH_DURATION.observe(time.perf_counter() - start)
+            FRAME_STORE_FLUSH_SIZE.observe(len(batch))
+            for serial_number, length in lengths.items():
+                REDIS_QUEUE_LENGTH.labels(serial_number=serial_number).set(length)
+
+    def _write(self, items):
+        lengths = self.store.push_batch(items)
+        if self.cold_store is not None:
+            now = time.monotonic()
+            self.aging.extend((now, serial_number, frame_message) for serial_number, frame_message in items)
+        return lengths
+
+    def demote(self):
+        # hot window 를 곧 넘길 프레임 -> 축소 사본으로 cold 저장 (FRAME_STORE_FLUSH_BATCH 개씩)
+        cutoff = time.monotonic() - (FRAME_STORE_HOT_WINDOW - FRAME_STORE_DEMOTE_INTERVAL)
+        while self.aging and self.aging[0][0] <= cutoff:
+            batch = []
+            while self.aging and self.aging[0][0] <= cutoff and len(batch) < FRAME_STORE_FLUSH_BATCH:
+                stored, serial_number, frame_message = self.aging.popleft()
+                if self.forgotten.get(serial_number, -1) < stored:
+                    batch.append((serial_number, cold_copy(frame_message)))
+            if not batch:
+                continue
+            try:
+                self.cold_store.push_batch(batch)
+            except redis.RedisError as e:
+                FRAME_STORE_DROPPED.labels(reason="redis_error").inc(len(batch))
+                logger.warning(f"Cold frame store write failed, dropped {len(batch)} frames: {e}")
+        for serial_number in [s for s, forgotten in list(self.forgotten.items()) if forgotten <= cutoff]:
+            del self.forgotten[serial_number]
+
+    def forget(self, serial_number):
+        # 카메라 제거 시 (CameraRegistry evict hook) 보관소의 카메라별 로컬 자원 정리
+        self.store.forget(serial_number)
+        if self.cold_store is not None:
+            self.forgotten[serial_number] = time.monotonic()
+            self.cold_store.forget(serial_number)
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(FRAME_STORE_FLUSH_INTERVAL)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception(f"Frame store flusher failed: {e}")
+
+    def _run_demote(self):
+        while True:
+            time.sleep(FRAME_STORE_DEMOTE_INTERVAL)
+            try:
+                self.demote()
+            except Exception as e:
+                logger.exception(f"Cold frame demotion failed: {e}")
 
     def get_frame_by_timestamp(self, serial_number, target_timestamp):
-        key = f"stream:{serial_number}"
-        target_timestamp_ms = int(target_timestamp * 1000)  # 밀리초로 변환
-
-        for item in self.redis.lrange(key, 0, -1):
-            data = pickle.loads(item)
-            if abs(data["timestamp"] - target_timestamp_ms) < 10:  # 밀리초 차이로 비교
-                return cv2.imdecode(np.frombuffer(data["image"], dtype=np.uint8), cv2.IMREAD_COLOR)
-        return None
+        # target_timestamp: 초, 10ms 이내 프레임만 반환
+        record = self.store.nearest(serial_number, target_timestamp)
+        if record is None or abs(record[0] - target_timestamp) >= 0.01:
+            return None
+        return cv2.imdecode(np.frombuffer(record[1], dtype=np.uint8), cv2.IMREAD_COLOR)
 
     def get_frames_in_range(self, serial_number, start_ts, end_ts):
-        key = f"stream:{serial_number}"
-        frames_with_roi = []
-        candidates = []
-
         expected_frame_count = int((end_ts - start_ts) * EXPECTED_FPS)
 
-        for item in reversed(self.redis.lrange(key, -self.max_queue_len, -1)):
-            data = pickle.loads(item)
-            ts = data["timestamp"]
-            candidates.append((abs((start_ts + end_ts) / 2 - ts), data))
-
-            if start_ts <= ts <= end_ts:
-                frame = cv2.imdecode(np.frombuffer(data["image"], dtype=np.uint8), cv2.IMREAD_COLOR)
-                roi = data.get("roi", {"x": 0, "y": 0, "w": frame.shape[1], "h": frame.shape[0]})
-                frames_with_roi.append((frame, roi))
-                if len(frames_with_roi) >= expected_frame_count:
+        # 구간 안 프레임 중 최근 expected_frame_count 개 (없으면 구간 중앙에 가장 가까운 프레임 1개)
+        # cold tier: 원본(hot)이 이미 정리된 앞부분은 축소 사본으로 채움
+        records = [(record, False) for record in self.store.frames_in_range(serial_number, start_ts, end_ts)]
+        if self.cold_store is not None:
+            hot_start = records[0][0][0] if records else end_ts + 1
+            cold = self.cold_store.frames_in_range(serial_number, start_ts, min(end_ts, hot_start))
+            records = [(record, True) for record in cold if record[0] < hot_start] + records
+        records = records[-max(expected_frame_count, 1):]
+        if not records:
+            for store, cold in ((self.store, False), (self.cold_store, True)):
+                nearest = store.nearest(serial_number, (start_ts + end_ts) / 2) if store is not None else None
+                if nearest is not None:
+                    records = [(nearest, cold)]
                     break
 
-        if not frames_with_roi and candidates:
-            _, nearest_data = min(candidates, key=lambda x: x[0])
-            frame = cv2.imdecode(np.frombuffer(nearest_data["image"], dtype=np.uint8), cv2.IMREAD_COLOR)
-            roi = nearest_data.get("roi", {"x": 0, "y": 0, "w": frame.shape[1], "h": frame.shape[0]})
+        frames_with_roi = []
+        for (_, image, roi), cold in records:
+            frame = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if cold:
+                # ROI 좌표가 원본 기준이므로 원래 크기로 되돌림
+                frame = cv2.resize(frame, cold_size(image, frame))
             frames_with_roi.append((frame, roi))
-
-        return list(reversed(frames_with_roi))
+        return frames_with_roi
 
 
     # def get_frames_in_range(self, serial_number, start_ts, end_ts):
@@ -0,0 +1,51 @@
+# app/feature_cache.py
+# [설명] : 카메라별 프레임 latent 캐시 (슬라이딩 윈도우 겹침 구간 CNN 재계산 방지)
+import threading
+from collections import OrderedDict, defaultdict
+from monitoring import FEATURE_CACHE_HITS, FEATURE_CACHE_MISSES
+
+class LatentCache:
+    """
+    serial_number -> {timestamp: latent[ae_latent_dim]}
+    - 윈도우 stride 가 BUFFER_SIZE // 2 이므로 직전 윈도우의 뒤쪽 절반이 다음 윈도우에서 재사용됨
+    - 카메라별 capacity 개까지만 보관 (오래된 timestamp 부터 제거)
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = defaultdict(OrderedDict)
+        self.lock = threading.Lock()
+
+    def lookup(self, serial_number, timestamps):
+        # 캐시에 있는 latent 는 즉시 꺼내 둠 (forward 전에 evict 되어도 안전)
+        with self.lock:
+            cached = self.entries.get(serial_number, {})
+            found = {ts: cached[ts] for ts in timestamps if ts in cached}
+        FEATURE_CACHE_HITS.inc(len(found))
+        FEATURE_CACHE_MISSES.inc(len(timestamps) - len(found))
+        return found
+
+    def store(self, serial_number, timestamps, latents):
+        with self.lock:
+            cached = self.entries[serial_number]
+            for ts, latent in zip(timestamps, latents):
+                cached[ts] = latent.clone()  # 배치 텐서의 view 를 두면 배치 전체가 해제되지 않으므로 행 단위로 복사
+                cached.move_to_end(ts)
+            while len(cached) > self.capacity:
+                cached.popitem(last=False)
+
+    def items(self, serial_number):
+        # (timestamps, latents) 복사본 (snapshot 용, hit/miss 집계 안 함)
+        with self.lock:
+            cached = self.entries.get(serial_number, {})
+            return list(cached.keys()), list(cached.values())
+
+    def drop(self, serial_number):
+        with self.lock:
+            self.entries.pop(serial_number, None)
+
+    def nbytes(self, serial_number):
+        with self.lock:
+            cached = self.entries.get(serial_number)
+            if not cached:
+                return 0
+            return sum(latent.element_size() * latent.nelement() for latent in cached.values())
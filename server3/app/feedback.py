@@ -0,0 +1,48 @@
+# app/feedback.py
+# [설명] : 카메라별 촬영 / 인코딩 권장값 (SendFrame Response, StreamAck 에 실어 보냄)
+#   - 낙상 의심 카메라 (최근 양성 판단)     : 항상 최대 fps / 화질
+#   - 서버 과부하 (in-flight, 추론 큐 길이)  : 나머지 카메라는 저 fps + 저화질 + 해상도 제한
+#   - 움직임 없는 카메라 (motion gate idle)  : 저 fps (움직임이 생기면 다음 응답에서 바로 최대 fps 로 복귀)
+#   -> 네트워크 대역폭과 서버 디코딩 CPU 절약
+from protos import streaming_pb2
+from constants import (
+    EXPECTED_FPS, MOTION_HOLD_WINDOWS, ADMISSION_MAX_INFLIGHT, MAX_BATCH_SIZE,
+    FEEDBACK_IDLE_FPS, FEEDBACK_JPEG_QUALITY, FEEDBACK_LOW_JPEG_QUALITY,
+    FEEDBACK_MAX_RESOLUTION, FEEDBACK_LOW_RESOLUTION, FEEDBACK_OVERLOAD, FEEDBACK_QUEUE_BATCHES
+)
+
+FULL = streaming_pb2.CaptureSettings(
+    recommended_fps=EXPECTED_FPS, jpeg_quality=FEEDBACK_JPEG_QUALITY,
+    max_width=FEEDBACK_MAX_RESOLUTION[0], max_height=FEEDBACK_MAX_RESOLUTION[1]
+)
+IDLE = streaming_pb2.CaptureSettings(
+    recommended_fps=FEEDBACK_IDLE_FPS, jpeg_quality=FEEDBACK_JPEG_QUALITY,
+    max_width=FEEDBACK_MAX_RESOLUTION[0], max_height=FEEDBACK_MAX_RESOLUTION[1]
+)
+DEGRADED = streaming_pb2.CaptureSettings(
+    recommended_fps=FEEDBACK_IDLE_FPS, jpeg_quality=FEEDBACK_LOW_JPEG_QUALITY,
+    max_width=FEEDBACK_LOW_RESOLUTION[0], max_height=FEEDBACK_LOW_RESOLUTION[1]
+)
+
+class FeedbackPolicy:
+    """
+    settings(serial_number) -> CaptureSettings
+    (servicer 의 inflight / is_suspected / scheduler 큐 / accumulator 움직임 상태를 읽기만 함)
+    """
+    def __init__(self, servicer):
+        self.servicer = servicer
+
+    def overloaded(self):
+        inflight = self.servicer.inflight() / ADMISSION_MAX_INFLIGHT
+        queued = self.servicer.scheduler.queue.qsize() / (MAX_BATCH_SIZE * FEEDBACK_QUEUE_BATCHES)
+        return max(inflight, queued) >= FEEDBACK_OVERLOAD
+
+    def settings(self, serial_number):
+        if self.servicer.is_suspected(serial_number):
+            return FULL
+        if self.overloaded():
+            return DEGRADED
+        accumulator = self.servicer.cameras.get(serial_number)
+        if accumulator is not None and accumulator.motion_gate.idle_runs > MOTION_HOLD_WINDOWS:
+            return IDLE
+        return FULL
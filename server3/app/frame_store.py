@@ -0,0 +1,535 @@
+# app/frame_store.py
+# [설명] : 카메라별 원본 프레임(JPEG) 보관소 (알림 영상 저장 시 SAVE_DURATION 구간을 다시 읽음)
+#   - "list"   : 기존 방식. pickle 한 dict 를 Redis list 에 RPUSH + LTRIM, 조회는 LRANGE 전체를 풀어서 선형 탐색
+#   - "stream" : Redis Streams. entry ID = 프레임 timestamp(ms), XADD MINID ~ 로 보관 범위 밖 정리(근사), 조회는 XRANGE start end
+#                (구간 길이에 비례한 조회, 메타데이터는 struct 고정 길이 binary -> pickle 역직렬화 비용 / 임의 객체 로딩 없음)
+#   - 조회 결과는 (timestamp[초], JPEG bytes, roi dict) 리스트 (timestamp 오름차순), 디코딩은 Dispatcher 가 수행
+#   - "shm"    : 단일 노드용. 카메라별 JPEG ring 을 공유 메모리(/dev/shm) mmap 파일에 저장, Redis 왕복 없음
+#   - push_batch(items) : 여러 카메라 프레임을 pipeline 1번(round trip 1번)으로 저장 (Dispatcher write-behind flusher 용)
+#   - 보관 범위는 프레임 수가 아니라 Retention (시간 horizon + 카메라별 / 전체 바이트 예산) 으로 정함
+import os
+import time
+import bisect
+import mmap
+import pickle
+import struct
+import logging
+import threading
+from collections import deque
+import numpy as np
+import redis
+from redis_pool import get_redis
+from monitoring import FRAME_STORE_BYTES, FRAME_STORE_BYTES_TOTAL, FRAME_STORE_DROPPED
+from constants import (
+    MAX_QUEUE_LEN, FRAME_STORE_SHM_DIR, FRAME_STORE_HORIZON, FRAME_STORE_CAMERA_BYTES, FRAME_STORE_TOTAL_BYTES
+)
+
+logger = logging.getLogger(__name__)
+
+LIST_KEY = "stream"
+STREAM_KEY = "frames"  # list 방식과 키가 겹치면 WRONGTYPE 이므로 분리
+
+# timestamp(ms), frame_id, roi x / y / w / h
+META = struct.Struct("<qiiiii")
+
+def _roi(frame_message):
+    return {"x": frame_message.roi_x, "y": frame_message.roi_y, "w": frame_message.roi_w, "h": frame_message.roi_h}
+
+class Retention:
+    """
+    카메라별 보관 중인 프레임 (key ms, bytes) 기록 -> push 마다 보관 범위를 넘은 오래된 프레임 정리 기준 계산
+    - 시간 : 가장 최근 프레임보다 horizon 초 이상 오래된 프레임
+    - 용량 : 카메라 예산 min(camera_bytes, total_bytes / 카메라 수) 를 넘으면 오래된 것부터 (최대 max_len 프레임)
+    - add() -> (보관 프레임 수, 보관할 최소 key): 저장소는 key 가 이보다 작은 프레임을 지움
+      (재시작 전 프레임은 기록에 없으므로 시간 기준으로만 정리됨)
+    - horizon 동안 push 가 없는 카메라는 기록에서 제거 (Redis 키도 같은 시간 뒤 만료)
+    """
+    def __init__(self, tier="hot", horizon=FRAME_STORE_HORIZON, camera_bytes=FRAME_STORE_CAMERA_BYTES,
+                 total_bytes=FRAME_STORE_TOTAL_BYTES, max_len=MAX_QUEUE_LEN):
+        self.tier = tier
+        self.horizon_ms = int(horizon * 1000)
+        self.camera_bytes = camera_bytes
+        self.total_bytes = total_bytes
+        self.max_len = max_len
+        self.frames = {}    # serial -> deque[(key ms, bytes)]
+        self.bytes = {}     # serial -> 보관 중인 bytes
+        self.trimmed = {}   # serial -> 마지막으로 정리한 프레임 key
+        self.updated = {}   # serial -> 마지막 push (monotonic)
+        self.total = 0
+        self.swept = time.monotonic()
+        self.lock = threading.Lock()  # 계산만 보호 (저장소 I/O 는 lock 밖)
+
+    def add(self, serial_number, timestamp_ms, nbytes):
+        with self.lock:
+            now = time.monotonic()
+            if now - self.swept >= self.horizon_ms / 1000:
+                self._sweep(now)
+            frames = self.frames.get(serial_number)
+            if frames is None:
+                frames = self.frames[serial_number] = deque()
+                self.bytes[serial_number] = 0
+                self.trimmed[serial_number] = 0
+            key = max(timestamp_ms, frames[-1][0]) if frames else timestamp_ms
+            frames.append((key, nbytes))
+            self.bytes[serial_number] += nbytes
+            self.total += nbytes
+            self.updated[serial_number] = now
+
+            budget = min(self.camera_bytes, self.total_bytes // len(self.frames))
+            while len(frames) > 1 and (frames[0][0] < key - self.horizon_ms
+                                       or self.bytes[serial_number] > budget or len(frames) > self.max_len):
+                trimmed, size = frames.popleft()
+                self.bytes[serial_number] -= size
+                self.total -= size
+                self.trimmed[serial_number] = trimmed
+
+            FRAME_STORE_BYTES.labels(serial_number=serial_number, tier=self.tier).set(self.bytes[serial_number])
+            FRAME_STORE_BYTES_TOTAL.labels(tier=self.tier).set(self.total)
+            return len(frames), max(key - self.horizon_ms, self.trimmed[serial_number] + 1)
+
+    def forget(self, serial_number):
+        with self.lock:
+            if serial_number in self.frames:
+                self._drop(serial_number)
+            FRAME_STORE_BYTES_TOTAL.labels(tier=self.tier).set(self.total)
+
+    def _sweep(self, now):
+        self.swept = now
+        for serial_number in [s for s, updated in self.updated.items() if now - updated >= self.horizon_ms / 1000]:
+            self._drop(serial_number)
+        FRAME_STORE_BYTES_TOTAL.labels(tier=self.tier).set(self.total)
+
+    def _drop(self, serial_number):
+        self.total -= self.bytes.pop(serial_number)
+        del self.frames[serial_number], self.trimmed[serial_number], self.updated[serial_number]
+        try:
+            FRAME_STORE_BYTES.remove(serial_number, self.tier)
+        except KeyError:
+            pass
+
+class FrameStore:
+    """
+    - push(serial, frame_message)           -> 저장 후 카메라 보관 프레임 수
+    - push_batch([(serial, frame_message)]) -> {serial: 보관 프레임 수}
+    - frames_in_range(serial, start, end)   -> [(timestamp, jpeg, roi)] (초 단위, 양 끝 포함)
+    - nearest(serial, timestamp)            -> 가장 가까운 (timestamp, jpeg, roi) 또는 None
+    - forget(serial)                        -> 카메라 제거 시 로컬 자원 정리 (Redis 키는 horizon 뒤 만료되므로 기록만 정리)
+    - remote : 저장이 네트워크 왕복이면 True (Dispatcher 가 write-behind 로 모아서 저장)
+    - namespace 가 다르면 (hot / cold tier) 서로 다른 키 / 디렉터리에 저장
+    """
+    name = None
+    remote = True
+
+    def push(self, serial_number, frame_message):
+        raise NotImplementedError
+
+    def push_batch(self, items):
+        return {serial_number: self.push(serial_number, frame_message) for serial_number, frame_message in items}
+
+    def frames_in_range(self, serial_number, start_ts, end_ts):
+        raise NotImplementedError
+
+    def nearest(self, serial_number, target_ts):
+        raise NotImplementedError
+
+    def forget(self, serial_number):
+        self.retention.forget(serial_number)
+
+class RedisListFrameStore(FrameStore):
+    """기존 Redis list 저장 방식 (Redis 7 미만 등 Streams 를 쓸 수 없는 환경용)"""
+    name = "list"
+
+    def __init__(self, redis_client, retention, namespace=None):
+        self.redis = redis_client
+        self.retention = retention
+        self.key = f"{LIST_KEY}:{namespace}:{{}}" if namespace else f"{LIST_KEY}:{{}}"
+
+    def push(self, serial_number, frame_message):
+        return self.push_batch([(serial_number, frame_message)])[serial_number]
+
+    def push_batch(self, items):
+        # items: [(serial_number, frame_message)] -> {serial_number: 보관 프레임 수}
+        pipe = self.redis.pipeline(transaction=False)
+        lengths = {}
+        for serial_number, frame_message in items:
+            pipe.rpush(self.key.format(serial_number), pickle.dumps(self._data(frame_message)))
+            lengths[serial_number], _ = self.retention.add(serial_number, frame_message.timestamp, len(frame_message.image))
+        for serial_number, length in lengths.items():
+            key = self.key.format(serial_number)
+            pipe.ltrim(key, -length, -1)
+            pipe.pexpire(key, self.retention.horizon_ms)
+        pipe.execute()
+        return lengths
+
+    def frames_in_range(self, serial_number, start_ts, end_ts):
+        return [record for record in self._records(serial_number) if start_ts <= record[0] <= end_ts]
+
+    def nearest(self, serial_number, target_ts):
+        records = self._records(serial_number)
+        if not records:
+            return None
+        return min(records, key=lambda record: abs(record[0] - target_ts))
+
+    @staticmethod
+    def _data(frame_message):
+        return {
+            "timestamp": frame_message.timestamp / 1000,
+            "frame_id": frame_message.frame_id,
+            "image": frame_message.image,
+            "roi": _roi(frame_message)
+        }
+
+    def _records(self, serial_number):
+        records = []
+        for item in self.redis.lrange(self.key.format(serial_number), 0, -1):
+            data = pickle.loads(item)
+            records.append((data["timestamp"], data["image"], data["roi"]))
+        return records
+
+class RedisStreamFrameStore(FrameStore):
+    """
+    Redis Streams 저장 방식 (entry ID "<timestamp ms>-*" 는 Redis 7.0 이상 필요)
+    - 같은 ms 의 프레임은 sequence 번호로 구분
+    - 스트림 ID 는 증가해야 하므로, 마지막 ID 보다 늦게 도착한 프레임은 마지막 ID 의 ms 에 붙여 저장
+      (실제 timestamp 는 메타데이터에 그대로 남고, 조회 결과는 메타데이터 timestamp 기준으로 정렬)
+    - trim 은 MINID ~ (근사): radix tree 노드 단위로만 지우므로 XADD 마다 비용이 작음
+      (보관 범위보다 오래된 entry 가 노드 하나만큼 더 남을 수 있지만, 조회는 시간 구간으로 하므로 결과에는 영향 없음)
+    """
+    name = "stream"
+
+    def __init__(self, redis_client, retention, namespace=None):
+        self.redis = redis_client
+        self.retention = retention
+        self.key = f"{STREAM_KEY}:{namespace}:{{}}" if namespace else f"{STREAM_KEY}:{{}}"
+        self.last_ms = {}  # 카메라별 마지막 entry ID 의 ms (카메라는 한 노드 / 한 lane 에서만 push)
+
+    def push(self, serial_number, frame_message):
+        key = self.key.format(serial_number)
+        fields = self._fields(frame_message)
+        entry_ms = max(frame_message.timestamp, self.last_ms.get(serial_number, 0))
+        length, min_key = self.retention.add(serial_number, entry_ms, len(frame_message.image))
+        try:
+            self._add(key, entry_ms, fields, min_key)
+        except redis.ResponseError:
+            # 재시작 / 다른 노드에서 카메라를 넘겨받은 직후: 스트림의 마지막 ID 를 읽어 다시 시도
+            last = self.redis.xrevrange(key, count=1)
+            if not last:
+                raise
+            entry_ms = max(entry_ms, int(last[0][0].split(b"-")[0]))
+            self._add(key, entry_ms, fields, min_key)
+        self.last_ms[serial_number] = entry_ms
+        return length
+
+    def push_batch(self, items):
+        # items: [(serial_number, frame_message)] -> {serial_number: 보관 프레임 수}
+        # 오래된 프레임은 XADD MINID ~ (근사 trim) 로 같이 정리, ID 가 거절된 프레임(재시작 직후 등)만 push 로 다시 저장
+        pipe = self.redis.pipeline(transaction=False)
+        last_ms = {}
+        lengths = {}
+        for serial_number, frame_message in items:
+            entry_ms = max(frame_message.timestamp, last_ms.get(serial_number, self.last_ms.get(serial_number, 0)))
+            last_ms[serial_number] = entry_ms
+            lengths[serial_number], min_key = self.retention.add(serial_number, entry_ms, len(frame_message.image))
+            pipe.xadd(self.key.format(serial_number), self._fields(frame_message),
+                      id=f"{entry_ms}-*", minid=min_key, approximate=True)
+        for serial_number in lengths:
+            pipe.pexpire(self.key.format(serial_number), self.retention.horizon_ms)
+        results = pipe.execute(raise_on_error=False)
+        self.last_ms.update(last_ms)
+
+        for (serial_number, frame_message), result in zip(items, results):
+            if isinstance(result, redis.ResponseError):
+                try:
+                    self._retry(serial_number, frame_message)
+                except redis.ResponseError as e:
+                    # 거절된 프레임만 버림 (같은 배치의 나머지 프레임은 이미 저장됨)
+                    FRAME_STORE_DROPPED.labels(reason="rejected").inc()
+                    logger.warning(f"[{serial_number}] Frame {frame_message.frame_id} rejected by frame store: {e}")
+        return lengths
+
+    def _retry(self, serial_number, frame_message):
+        key = self.key.format(serial_number)
+        last = self.redis.xrevrange(key, count=1)
+        if not last:
+            raise redis.ResponseError(f"Frame store rejected entry for {serial_number}")
+        entry_ms = max(self.last_ms.get(serial_number, 0), int(last[0][0].split(b"-")[0]))
+        self._add(key, entry_ms, self._fields(frame_message), 0)
+        self.last_ms[serial_number] = entry_ms
+
+    @staticmethod
+    def _fields(frame_message):
+        return {
+            "m": META.pack(frame_message.timestamp, frame_message.frame_id, frame_message.roi_x,
+                           frame_message.roi_y, frame_message.roi_w, frame_message.roi_h),
+            "i": frame_message.image
+        }
+
+    def _add(self, key, entry_ms, fields, min_key):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xadd(key, fields, id=f"{entry_ms}-*", minid=min_key, approximate=True)
+        pipe.pexpire(key, self.retention.horizon_ms)
+        pipe.execute()
+
+    def frames_in_range(self, serial_number, start_ts, end_ts):
+        entries = self.redis.xrange(self.key.format(serial_number), min=int(start_ts * 1000), max=int(end_ts * 1000))
+        records = [record for record in map(self._record, entries) if start_ts <= record[0] <= end_ts]
+        return sorted(records, key=lambda record: record[0])
+
+    def nearest(self, serial_number, target_ts):
+        # target 직전 1개 + 직후 1개만 읽어서 비교
+        key = self.key.format(serial_number)
+        target_ms = int(target_ts * 1000)
+        entries = self.redis.xrevrange(key, max=target_ms, count=1) + self.redis.xrange(key, min=target_ms, count=1)
+        if not entries:
+            return None
+        return min(map(self._record, entries), key=lambda record: abs(record[0] - target_ts))
+
+    @staticmethod
+    def _record(entry):
+        _, fields = entry
+        timestamp_ms, _, x, y, w, h = META.unpack(fields[b"m"])
+        return timestamp_ms / 1000, fields[b"i"], {"x": x, "y": y, "w": w, "h": h}
+
+class FrameRing:
+    """
+    카메라 1대의 프레임 ring (mmap 파일 1개)
+    [header: written, oldest, data_pos] [index: key / timestamp / offset / size / meta x capacity] [JPEG data (byte ring)]
+    - entry seq(누적 번호) s 는 index slot s % capacity 에 기록, 유효 범위는 [oldest, written)
+    - key = max(timestamp, 직전 key) 로 seq 순서대로 정렬 -> 구간 조회는 key 이진 탐색
+    - append: 덮어쓸 byte 구간 / slot 을 가진 오래된 entry 부터 oldest 를 올려 무효화한 뒤 기록, 마지막에 written 증가
+    - 읽기는 lock 없음: 복사 후 oldest 를 다시 읽어 그 사이 덮어써진 entry 는 버림
+    - 쓰기는 프로세스 안의 threading.Lock 으로 직렬화 (lock-free writer 가 아님)
+      : 파이프라인 lane 은 카메라별로 이미 직렬이라 경합이 없지만, 파이프라인을 끈 동기 경로에서는 같은 카메라의
+        SendFrame 이 동시에 들어올 수 있고 카메라 제거 시 close() 와도 겹칠 수 있음
+      : 프로세스 간에는 보호하지 않으므로 ring 파일 하나에는 프로세스 1개만 써야 함
+        (멀티 프로세스 모드는 카메라가 워커 1개에 고정되는 dispatcher 라우팅에서만 사용, workers.serve_workers 에서 확인)
+    """
+    HEADER = 3
+
+    def __init__(self, path, capacity, data_bytes):
+        self.capacity = capacity
+        self.data_bytes = data_bytes
+        index_bytes = capacity * 8 * 4 + capacity * 4 * 5
+        size = self.HEADER * 8 + index_bytes + data_bytes
+        with open(path, "a+b") as f:
+            if os.path.getsize(path) != size:
+                f.truncate(0)
+            # 전체를 미리 할당: tmpfs(/dev/shm) 가 가득 차면 여기서 ENOSPC (sparse 파일이면 나중에 mmap 쓰기에서 SIGBUS 로 죽음)
+            os.posix_fallocate(f.fileno(), 0, size)
+            self.mm = mmap.mmap(f.fileno(), size)
+
+        offset = 0
+        def view(dtype, shape):
+            nonlocal offset
+            array = np.ndarray(shape, dtype=dtype, buffer=self.mm, offset=offset)
+            offset += array.nbytes
+            return array
+        self.header = view(np.int64, (self.HEADER,))
+        self.keys = view(np.int64, (capacity,))
+        self.timestamps = view(np.int64, (capacity,))
+        self.offsets = view(np.int64, (capacity,))
+        self.sizes = view(np.int64, (capacity,))
+        self.meta = view(np.int32, (capacity, 5))  # frame_id, roi x / y / w / h
+        self.data_offset = offset
+        self.lock = threading.Lock()  # 같은 프로세스 안의 쓰기 / close 직렬화 (읽기는 사용 안 함)
+
+    def __len__(self):
+        written, oldest, _ = self.header
+        return int(written - oldest)
+
+    def append(self, frame_message, min_key=0):
+        # min_key 보다 key 가 작은 entry 는 무효화 (Retention 의 시간 / 예산 기준)
+        image = frame_message.image
+        size = len(image)
+        if size > self.data_bytes:
+            raise ValueError(f"Frame of {size} bytes exceeds frame ring data size {self.data_bytes}")
+        with self.lock:
+            if self.header is None:  # 카메라 제거로 닫힌 ring
+                return 0
+            written, oldest, position = (int(v) for v in self.header)
+            if position + size > self.data_bytes:
+                position = 0
+            # 기록할 byte 구간 [position, position + size) 와 겹치는 entry 중 가장 최근 것까지 무효화 (+ slot 수 제한)
+            seqs = np.arange(oldest, written)
+            slots = seqs % self.capacity
+            overlap = (self.offsets[slots] < position + size) & (self.offsets[slots] + self.sizes[slots] > position)
+            if overlap.any():
+                oldest = int(seqs[overlap][-1]) + 1
+            oldest = max(oldest, written + 1 - self.capacity)
+            if oldest < written:
+                oldest += bisect.bisect_left(_SeqKeys(self.keys, self.capacity, oldest), min_key, 0, written - oldest)
+            self.header[1] = oldest
+
+            self.mm[self.data_offset + position:self.data_offset + position + size] = image
+            slot = written % self.capacity
+            last_key = int(self.keys[(written - 1) % self.capacity]) if written > oldest else 0
+            self.keys[slot] = max(frame_message.timestamp, last_key)
+            self.timestamps[slot] = frame_message.timestamp
+            self.offsets[slot] = position
+            self.sizes[slot] = size
+            self.meta[slot] = (frame_message.frame_id, frame_message.roi_x, frame_message.roi_y,
+                               frame_message.roi_w, frame_message.roi_h)
+            self.header[2] = position + size
+            self.header[0] = written + 1
+            return int(written + 1 - oldest)
+
+    def read(self, start_ms, end_ms):
+        written, oldest = int(self.header[0]), int(self.header[1])
+        seqs = _SeqKeys(self.keys, self.capacity, oldest)
+        lo = oldest + bisect.bisect_left(seqs, start_ms, 0, written - oldest)
+        hi = oldest + bisect.bisect_right(seqs, end_ms, 0, written - oldest)
+        return self._copy(range(lo, hi))
+
+    def around(self, target_ms):
+        # target 직전 / 직후 entry
+        written, oldest = int(self.header[0]), int(self.header[1])
+        i = oldest + bisect.bisect_left(_SeqKeys(self.keys, self.capacity, oldest), target_ms, 0, written - oldest)
+        return self._copy(range(max(i - 1, oldest), min(i + 1, written)))
+
+    def _copy(self, seqs):
+        records = []
+        for seq in seqs:
+            slot = seq % self.capacity
+            start = self.data_offset + int(self.offsets[slot])
+            _, x, y, w, h = (int(v) for v in self.meta[slot])
+            records.append((seq, int(self.timestamps[slot]) / 1000,
+                            bytes(self.mm[start:start + int(self.sizes[slot])]), {"x": x, "y": y, "w": w, "h": h}))
+        oldest = int(self.header[1])
+        return [record[1:] for record in records if record[0] >= oldest]
+
+    def close(self):
+        with self.lock:
+            self.header = self.keys = self.timestamps = self.offsets = self.sizes = self.meta = None
+            try:
+                self.mm.close()
+            except BufferError:
+                pass  # 읽는 중인 스레드가 view 를 잡고 있으면 마지막 참조가 사라질 때 unmap
+
+class _SeqKeys:
+    """seq 범위 [oldest, written) 를 bisect 할 수 있도록 key 배열을 0-based sequence 로 보여줌"""
+    def __init__(self, keys, capacity, oldest):
+        self.keys = keys
+        self.capacity = capacity
+        self.oldest = oldest
+
+    def __getitem__(self, i):
+        return int(self.keys[(self.oldest + i) % self.capacity])
+
+class SharedMemoryFrameStore(FrameStore):
+    """
+    단일 노드용 프레임 보관소: 카메라별 FrameRing (FRAME_STORE_SHM_DIR/<serial>.ring, 기본 /dev/shm 아래 tmpfs)
+    - ring 크기는 카메라 예산 (retention.max_len 프레임 / retention.camera_bytes 바이트), 그 안에서 Retention 기준으로 정리
+    - 파일이 남아 있으면 재시작 후에도 이어서 사용 (알림 영상 pre-roll 유지)
+    - ring 합계가 retention.total_bytes 를 넘거나 tmpfs 에 공간이 없으면 새 카메라 ring 은 만들지 않음 (그 카메라 프레임은 저장하지 않음)
+    - 카메라가 제거되면 (CameraRegistry evict hook -> forget) ring 을 unmap 하고 파일 삭제
+    """
+    name = "shm"
+    remote = False
+
+    def __init__(self, retention, namespace=None, directory=FRAME_STORE_SHM_DIR):
+        self.retention = retention
+        self.directory = os.path.join(directory, namespace) if namespace else directory
+        self.rings = {}
+        self.reserved = 0      # 만든 ring 의 data 영역 합계
+        self.refused = set()   # 예산 부족으로 ring 을 만들지 못한 카메라 (경고 1번만)
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, serial_number):
+        return os.path.join(self.directory, f"{serial_number.replace('/', '_')}.ring")
+
+    def ring(self, serial_number):
+        # 없으면 생성, 전체 예산을 넘으면 None
+        ring = self.rings.get(serial_number)
+        if ring is not None:
+            return ring
+        with self.lock:
+            ring = self.rings.get(serial_number)
+            if ring is not None:
+                return ring
+            if self.reserved + self.retention.camera_bytes > self.retention.total_bytes:
+                if serial_number not in self.refused:
+                    self.refused.add(serial_number)
+                    logger.warning(f"[{serial_number}] Frame ring not created: {len(self.rings)} rings already use "
+                                   f"{self.reserved / 2**20:.0f} MiB of {self.retention.total_bytes / 2**20:.0f} MiB")
+                return None
+            try:
+                ring = FrameRing(self._path(serial_number), self.retention.max_len, self.retention.camera_bytes)
+            except OSError as e:
+                if serial_number not in self.refused:
+                    self.refused.add(serial_number)
+                    logger.warning(f"[{serial_number}] Frame ring not created in {self.directory}: {e}")
+                try:
+                    os.unlink(self._path(serial_number))
+                except FileNotFoundError:
+                    pass
+                return None
+            self.refused.discard(serial_number)
+            self.rings[serial_number] = ring
+            self.reserved += ring.data_bytes
+            return ring
+
+    def push(self, serial_number, frame_message):
+        ring = self.ring(serial_number)
+        if ring is None:
+            FRAME_STORE_DROPPED.labels(reason="store_full").inc()
+            return 0
+        _, min_key = self.retention.add(serial_number, frame_message.timestamp, len(frame_message.image))
+        return ring.append(frame_message, min_key)
+
+    def frames_in_range(self, serial_number, start_ts, end_ts):
+        ring = self.rings.get(serial_number)
+        if ring is None:
+            return []
+        records = ring.read(int(start_ts * 1000), int(end_ts * 1000))
+        return sorted((record for record in records if start_ts <= record[0] <= end_ts), key=lambda record: record[0])
+
+    def nearest(self, serial_number, target_ts):
+        ring = self.rings.get(serial_number)
+        records = ring.around(int(target_ts * 1000)) if ring is not None else []
+        if not records:
+            return None
+        return min(records, key=lambda record: abs(record[0] - target_ts))
+
+    def forget(self, serial_number):
+        with self.lock:
+            ring = self.rings.pop(serial_number, None)
+            self.refused.discard(serial_number)
+            if ring is not None:
+                self.reserved -= ring.data_bytes
+        self.retention.forget(serial_number)
+        if ring is None:
+            return
+        ring.close()
+        try:
+            os.unlink(self._path(serial_number))
+        except FileNotFoundError:
+            pass
+
+FRAME_STORES = {
+    RedisListFrameStore.name: RedisListFrameStore,
+    RedisStreamFrameStore.name: RedisStreamFrameStore,
+    SharedMemoryFrameStore.name: SharedMemoryFrameStore,
+}
+
+def build_frame_store(name, retention, namespace=None):
+    if name not in FRAME_STORES:
+        raise ValueError(f"Unknown frame store: {name} (available: {', '.join(FRAME_STORES)})")
+    if not FRAME_STORES[name].remote:
+        logger.info(f"Frame store: {name} ({retention.tier}, horizon {retention.horizon_ms / 1000:.1f}s)")
+        return FRAME_STORES[name](retention, namespace)
+
+    redis_client = get_redis()
+    if name == RedisStreamFrameStore.name:
+        # "<ms>-*" entry ID 는 Redis 7.0 부터: 그 전 버전은 모든 XADD 가 거절되어 알림 영상이 비게 되므로 list 로 대체
+        #   (INFO 는 막혀 있거나 이름이 바뀐 환경이 있어 버전 문자열 대신 실제 XADD 로 확인)
+        probe = f"{STREAM_KEY}:probe"
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.xadd(probe, {"p": b""}, id="1-*")
+        pipe.delete(probe)
+        if isinstance(pipe.execute(raise_on_error=False)[0], redis.ResponseError):
+            logger.warning("Redis does not support stream entry IDs '<ms>-*' (needs Redis 7.0+), "
+                           "falling back to the list frame store")
+            name = RedisListFrameStore.name
+    logger.info(f"Frame store: {name} ({retention.tier}, horizon {retention.horizon_ms / 1000:.1f}s)")
+    return FRAME_STORES[name](redis_client, retention, namespace)
@@ -1,28 +1,39 @@
 # app/main.py
 # [설명] : 서버 시작 메인
 import grpc
-import time
+import asyncio
+import threading
+import signal
 import logging
 import torch
-import numpy as np
-import cv2
 from concurrent import futures
-from collections import defaultdict
 import sys, os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'protos'))
 from protos import streaming_pb2_grpc, streaming_pb2
 
 from dispatcher import Dispatcher
-from detector import InferenceEngine
+from detector import InferenceEngine, INPUT_SIZE
+from decode import decode_roi
 from accumulator import FrameAccumulator
+from scheduler import InferenceScheduler
+from registry import CameraRegistry
+from cluster import ClusterMembership, NotOwner
+from snapshot import Snapshotter, restore_state
+from pipeline import FramePipeline
+from admission import AdmissionController, Overloaded
+from feedback import FeedbackPolicy
+from decode_pool import DecodePool
 
 # Prometheus HTTP endpoint
 from prometheus_client import start_http_server
 
-from constants import REDIS_HOST, REDIS_PORT, BUFFER_SIZE
-
-start_http_server(8000)
+from constants import BUFFER_SIZE, REDUCED_DECODE, STREAM_ACK_INTERVAL
+from constants import (
+    SERVER_MODE, GRPC_PORT, GRPC_MAX_WORKERS, GRPC_MAX_CONCURRENT_RPCS,
+    DECODE_WORKERS, INFERENCE_WORKERS, INGEST_PIPELINE, METRICS_PORT, WORKER_PROCESSES,
+    DECODE_PROCESSES, ADMISSION_CONTROL, CLUSTER_MODE, SNAPSHOT_BACKEND, SHUTDOWN_GRACE
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,7 +41,6 @@ logger = logging.getLogger(__name__)
 class FrameStreamerServicer(streaming_pb2_grpc.FrameStreamerServicer):
     def __init__(self):
         self.dispatcher = Dispatcher()
-        self.frame_accumulators = defaultdict(lambda: None)
         base_dir = os.path.dirname(os.path.abspath(__file__))
         model_path = os.path.join(base_dir, "checkpoints", "cnn_ae_gru_transformer_fast30.pth")
         # model_path = os.path.join(base_dir, "checkpoints", "cnn_ae_lstm_transformer_lightcnn_v5_seq30_epoch100.pth")
@@ -39,64 +49,321 @@ class FrameStreamerServicer(streaming_pb2_grpc.FrameStreamerServicer):
             device="cuda" if torch.cuda.is_available() else "cpu",
             buffer_size=BUFFER_SIZE
         )
+        self.scheduler = InferenceScheduler(self.inference_engine)
+        self.cameras = CameraRegistry(self.create_accumulator, self.inference_engine)
+        self.cameras.evict_hooks.append(self.dispatcher.forget)
+        self.cluster = ClusterMembership(self.cameras) if CLUSTER_MODE else None
+        self.snapshots = Snapshotter(self.cameras, self.inference_engine) if SNAPSHOT_BACKEND else None
+        self.pipeline = None
+        if INGEST_PIPELINE:
+            decode_pool = None
+            if DECODE_PROCESSES > 0:
+                try:
+                    decode_pool = DecodePool(INPUT_SIZE)
+                except OSError as e:
+                    logger.warning(f"Decode pool disabled, decoding in pipeline threads: {e}")
+            self.pipeline = FramePipeline(self, decode_pool=decode_pool)
+        self.active_frames = 0  # 동기 경로에서 처리 중인 프레임 수
+        self.active_lock = threading.Lock()
+        self.admission = AdmissionController(self.inflight, self.is_suspected) if ADMISSION_CONTROL else None
+        self.feedback = FeedbackPolicy(self)
 
     def SendFrame(self, request, context):
+        serial_number = request.serial_number
+        try:
+            self.handle_frame(request)
+            return streaming_pb2.Response(status="Frame received and queued", settings=self.feedback.settings(serial_number))
+
+        except NotOwner as e:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details(str(e))
+            context.set_trailing_metadata((("cluster-owner", e.owner),))
+            return streaming_pb2.Response(status=f"Redirect to {e.owner}")
+
+        except Overloaded as e:
+            logger.debug(str(e))
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details('Server busy, frame dropped')
+            context.set_trailing_metadata((("retry-after-ms", str(e.retry_after_ms)),))
+            return streaming_pb2.Response(status=f"Server busy, retry after {e.retry_after_ms}ms")
+
+        except Exception as e:
+            logger.exception(f"Error processing frame from serial_number {serial_number}: {e}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details('Frame processing failed')
+            return streaming_pb2.Response(status="Frame processing failed")
+
+    def StreamFrames(self, request_iterator, context):
+        # 카메라 1대당 장기 스트림: 프레임마다 응답하지 않고 STREAM_ACK_INTERVAL 마다 ack, 실패 / 권장값 변경 시 즉시 알림
+        received = 0
+        last_settings = None
+        for request in request_iterator:
+            received += 1
+            try:
+                self.handle_frame(request)
+            except NotOwner as e:
+                # 스트림 전체를 담당 노드로 다시 연결해야 함
+                context.set_trailing_metadata((("cluster-owner", e.owner),))
+                context.abort(grpc.StatusCode.FAILED_PRECONDITION, str(e))
+            except Overloaded as e:
+                logger.debug(str(e))
+                last_settings = self.feedback.settings(request.serial_number)
+                yield streaming_pb2.StreamAck(frame_id=request.frame_id, frames_received=received, status=f"Server busy, retry after {e.retry_after_ms}ms", settings=last_settings)
+                continue
+            except Exception as e:
+                logger.exception(f"Error processing streamed frame from serial_number {request.serial_number}: {e}")
+                yield streaming_pb2.StreamAck(frame_id=request.frame_id, frames_received=received, status="Frame processing failed")
+                continue
+
+            # 권장값이 바뀌면 ack 주기를 기다리지 않고 바로 알림
+            settings = self.feedback.settings(request.serial_number)
+            if received % STREAM_ACK_INTERVAL == 0 or settings != last_settings:
+                last_settings = settings
+                yield streaming_pb2.StreamAck(frame_id=request.frame_id, frames_received=received, status="ok", settings=settings)
+
+    def handle_frame(self, request):
+        self.check_owner(request.serial_number)
+        if self.admission is not None:
+            self.admission.admit(request.serial_number)
+        if self.pipeline is not None:
+            # 큐에 넣고 바로 반환 (디코딩/추론/판단은 파이프라인 스레드에서)
+            self.pipeline.submit(request)
+            return
+        with self.active_lock:
+            self.active_frames += 1
+        try:
+            frame = self.ingest_frame(request)
+            self.accumulate_frame(request.serial_number, frame, request.timestamp)
+        finally:
+            with self.active_lock:
+                self.active_frames -= 1
+
+    def check_owner(self, serial_number):
+        if self.cluster is not None and not self.cluster.owns(serial_number):
+            raise NotOwner(serial_number, self.cluster.owner(serial_number))
+
+    def inflight(self):
+        return self.pipeline.depth() if self.pipeline is not None else self.active_frames
+
+    def is_suspected(self, serial_number):
+        # 최근 판단 중 양성이 있는 카메라 (admission 에서 우선 처리)
+        accumulator = self.cameras.get(serial_number)
+        return accumulator is not None and any(accumulator.pred_history)
+
+    def ingest_frame(self, request):
+        # Redis 원본 프레임 저장 + 추론용 디코딩/ROI crop
         serial_number = request.serial_number
         frame_id = request.frame_id
         logger.info(f"Received frame_id {frame_id} from serial_number: {serial_number}")
 
+        self.dispatcher.add_to_queue(serial_number, request)
+
+        return self.preprocess_frame(
+            request.image,
+            request.roi_x,
+            request.roi_y,
+            request.roi_w,
+            request.roi_h
+        )
+
+    def accumulate_frame(self, serial_number, frame, timestamp):
+        # 카메라별 ring buffer 에 추가 (윈도우가 차면 추론 / 판단까지 수행)
+        self.get_accumulator(serial_number).add_frame(frame, timestamp)
+
+    def get_accumulator(self, serial_number):
+        return self.cameras.get_or_create(serial_number)
+
+    def create_accumulator(self, serial_number):
+        accumulator = FrameAccumulator(
+            serial_number=serial_number,
+            inference_engine=self.inference_engine,
+            dispatcher=self.dispatcher,
+            scheduler=self.scheduler
+        )
+        if self.cluster is not None:
+            # 다른 노드가 담당하던 카메라면 넘겨준 상태(버퍼 / 판단 이력 / 쿨다운)에서 이어서 시작
+            data = self.cluster.take_handoff(serial_number)
+            if data is not None:
+                try:
+                    warm = restore_state(data, accumulator, self.inference_engine)
+                    logger.info(f"[{serial_number}] Camera state restored from cluster handoff ({'warm start' if warm else 'cooldown only'})")
+                    return accumulator
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"[{serial_number}] Cluster handoff restore failed: {e}")
+        if self.snapshots is not None:
+            # 재시작 직후: 마지막 snapshot 에서 이어서 시작 (첫 프레임에서 바로 판단)
+            self.snapshots.restore(accumulator)
+        return accumulator
+
+    def shutdown(self):
+        # 정상 종료 (SIGTERM / Ctrl+C): 남은 프레임 처리 -> 마지막 snapshot -> 클러스터 탈퇴 (단계마다 실패해도 다음 단계 진행)
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        if self.dispatcher.pending is not None:
+            self.dispatcher.flush()
+        if self.snapshots is not None:
+            try:
+                self.snapshots.save_all(force=True)
+            except Exception as e:
+                logger.exception(f"Final camera snapshot failed: {e}")
+        if self.cluster is not None:
+            try:
+                self.cluster.leave()
+            except Exception as e:
+                logger.exception(f"Leaving cluster failed: {e}")
+        logger.info("Server state saved, shutting down")
+
+    def LookupOwner(self, request, context):
+        if self.cluster is None:
+            return streaming_pb2.OwnerReply(serial_number=request.serial_number, owner="", nodes=[])
+        return streaming_pb2.OwnerReply(
+            serial_number=request.serial_number,
+            owner=self.cluster.owner(request.serial_number),
+            nodes=self.cluster.ring.nodes
+        )
+
+    def preprocess_frame(self, frame_bytes, roi_x, roi_y, roi_w, roi_h):
+        # 추론용: ROI 크기에 맞춰 1/2~1/8 축소 디코딩 (알림 영상은 dispatcher 에서 원본 디코딩)
+        return decode_roi(frame_bytes, roi_x, roi_y, roi_w, roi_h, target=INPUT_SIZE, reduced=REDUCED_DECODE)
+
+class AioFrameStreamerServicer(streaming_pb2_grpc.FrameStreamerServicer):
+    """
+    grpc.aio 서버용 servicer
+    - RPC 처리는 이벤트 루프에서, Redis push/디코딩과 누적/추론은 각각 전용 executor 로 넘김
+    - 느린 추론이나 Redis 호출이 있어도 다른 카메라 연결은 계속 받음
+    """
+    def __init__(self, servicer):
+        self.servicer = servicer
+        self.decode_executor = futures.ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="decode")
+        self.inference_executor = futures.ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+
+    async def handle_frame(self, request):
+        if self.servicer.pipeline is not None:
+            if self.servicer.is_suspected(request.serial_number):
+                # lane 큐가 가득 차면 잠깐 기다릴 수 있으므로 이벤트 루프 밖에서 넣음
+                await asyncio.get_running_loop().run_in_executor(self.decode_executor, self.servicer.handle_frame, request)
+                return
+            self.servicer.handle_frame(request)  # 큐에 넣기만 하므로 이벤트 루프에서 바로 호출
+            return
+        self.servicer.check_owner(request.serial_number)
+        if self.servicer.admission is not None:
+            self.servicer.admission.admit(request.serial_number)
+        loop = asyncio.get_running_loop()
+        self.servicer.active_frames += 1  # 이벤트 루프 스레드에서만 증감
         try:
-            self.dispatcher.add_to_queue(serial_number, request)
-
-            if self.frame_accumulators[serial_number] is None:
-                self.frame_accumulators[serial_number] = FrameAccumulator(
-                    serial_number=serial_number,
-                    inference_engine=self.inference_engine,
-                    dispatcher=self.dispatcher
-                )
-
-            frame = self.preprocess_frame(
-                request.image,
-                request.roi_x,
-                request.roi_y,
-                request.roi_w,
-                request.roi_h
+            frame = await loop.run_in_executor(self.decode_executor, self.servicer.ingest_frame, request)
+            await loop.run_in_executor(
+                self.inference_executor, self.servicer.accumulate_frame,
+                request.serial_number, frame, request.timestamp
             )
-            timestamp = request.timestamp
-            self.frame_accumulators[serial_number].add_frame(frame, timestamp)
+        finally:
+            self.servicer.active_frames -= 1
+
+    async def SendFrame(self, request, context):
+        try:
+            await self.handle_frame(request)
+            return streaming_pb2.Response(status="Frame received and queued", settings=self.servicer.feedback.settings(request.serial_number))
 
-            return streaming_pb2.Response(status="Frame received and queued")
+        except NotOwner as e:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details(str(e))
+            context.set_trailing_metadata((("cluster-owner", e.owner),))
+            return streaming_pb2.Response(status=f"Redirect to {e.owner}")
+
+        except Overloaded as e:
+            logger.debug(str(e))
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details('Server busy, frame dropped')
+            context.set_trailing_metadata((("retry-after-ms", str(e.retry_after_ms)),))
+            return streaming_pb2.Response(status=f"Server busy, retry after {e.retry_after_ms}ms")
 
         except Exception as e:
-            logger.exception(f"Error processing frame from serial_number {serial_number}: {e}")
+            logger.exception(f"Error processing frame from serial_number {request.serial_number}: {e}")
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details('Frame processing failed')
             return streaming_pb2.Response(status="Frame processing failed")
 
-    def preprocess_frame(self, frame_bytes, roi_x, roi_y, roi_w, roi_h):
-        np_frame = np.frombuffer(frame_bytes, dtype=np.uint8)
-        frame = cv2.imdecode(np_frame, cv2.IMREAD_COLOR)
+    async def LookupOwner(self, request, context):
+        return self.servicer.LookupOwner(request, context)
+
+    async def StreamFrames(self, request_iterator, context):
+        received = 0
+        last_settings = None
+        async for request in request_iterator:
+            received += 1
+            try:
+                await self.handle_frame(request)
+            except NotOwner as e:
+                # 스트림 전체를 담당 노드로 다시 연결해야 함
+                context.set_trailing_metadata((("cluster-owner", e.owner),))
+                await context.abort(grpc.StatusCode.FAILED_PRECONDITION, str(e))
+            except Overloaded as e:
+                logger.debug(str(e))
+                last_settings = self.servicer.feedback.settings(request.serial_number)
+                yield streaming_pb2.StreamAck(frame_id=request.frame_id, frames_received=received, status=f"Server busy, retry after {e.retry_after_ms}ms", settings=last_settings)
+                continue
+            except Exception as e:
+                logger.exception(f"Error processing streamed frame from serial_number {request.serial_number}: {e}")
+                yield streaming_pb2.StreamAck(frame_id=request.frame_id, frames_received=received, status="Frame processing failed")
+                continue
 
-        if frame is None:
-            raise ValueError("cv2.imdecode failed: frame is None")
+            # 권장값이 바뀌면 ack 주기를 기다리지 않고 바로 알림
+            settings = self.servicer.feedback.settings(request.serial_number)
+            if received % STREAM_ACK_INTERVAL == 0 or settings != last_settings:
+                last_settings = settings
+                yield streaming_pb2.StreamAck(frame_id=request.frame_id, frames_received=received, status="ok", settings=settings)
 
-        if roi_w > 0 and roi_h > 0:
-            if roi_x + roi_w <= frame.shape[1] and roi_y + roi_h <= frame.shape[0]:
-                frame = frame[roi_y:roi_y+roi_h, roi_x:roi_x+roi_w]
+async def serve_aio(port=GRPC_PORT, options=()):
+    server = grpc.aio.server(maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS, options=options)
+    servicer = FrameStreamerServicer()
+    streaming_pb2_grpc.add_FrameStreamerServicer_to_server(AioFrameStreamerServicer(servicer), server)
+    server.add_insecure_port(f'[::]:{port}')
+    await server.start()
+    logger.info(f"gRPC aio server running on port {port}...")
 
-        return frame
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+    try:
+        await stopping.wait()
+        logger.info("Shutdown signal received")
+        await server.stop(SHUTDOWN_GRACE)
+    finally:
+        await loop.run_in_executor(None, servicer.shutdown)  # pipeline join / Redis 저장은 블로킹
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    streaming_pb2_grpc.add_FrameStreamerServicer_to_server(FrameStreamerServicer(), server)
-    server.add_insecure_port('[::]:6000')
+def serve(port=GRPC_PORT, options=()):
+    if SERVER_MODE == "aio":
+        asyncio.run(serve_aio(port, options))
+        return
+
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=GRPC_MAX_WORKERS),
+        options=options,
+        maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS
+    )
+    servicer = FrameStreamerServicer()
+    streaming_pb2_grpc.add_FrameStreamerServicer_to_server(servicer, server)
+    server.add_insecure_port(f'[::]:{port}')
     server.start()
-    logger.info("gRPC server running on port 6000...")
+    logger.info(f"gRPC server running on port {port}...")
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())  # docker stop / 워커 terminate()
     try:
-        while True:
-            time.sleep(86400)
+        stopping.wait()
+        logger.info("Shutdown signal received")
     except KeyboardInterrupt:
-        server.stop(0)
+        pass
+    finally:
+        server.stop(SHUTDOWN_GRACE).wait()
+        servicer.shutdown()
 
 if __name__ == '__main__':
-    serve()
\ No newline at end of file
+    # Prometheus: 메인 프로세스는 METRICS_PORT, 워커 i 는 METRICS_PORT + 1 + i
+    start_http_server(METRICS_PORT)
+    if WORKER_PROCESSES > 0:
+        from workers import serve_workers
+        serve_workers()
+    else:
+        serve()
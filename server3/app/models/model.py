@@ -56,6 +56,26 @@ class CNNAE_LSTM_Transformer(nn.Module):
         
         self.fc_cls = nn.Linear(transformer_d_model, num_classes)
 
+    def encode(self, x):
+        # 프레임 단위 인코딩 (시퀀스와 무관) - 추론 시 프레임별 캐시에 사용
+        feat = self.cnn(x)           # [N, 256]
+        return self.ae_encoder(feat) # [N, ae_latent_dim]
+
+    def classify(self, latent_seq):
+        # latent 시퀀스 -> GRU -> Transformer -> 마지막 시점 분류
+        gru_out, _ = self.gru(latent_seq)     # [B, seq, gru_hidden_dim]
+        return self.head(gru_out)
+
+    def head(self, gru_out):
+        trans_out = self.transformer(gru_out) # [B, seq, transformer_d_model]
+        final_out = trans_out[:, -1, :]       # [B, transformer_d_model]
+        return self.fc_cls(final_out)
+
+    def step(self, latent, hidden=None):
+        # 스트리밍 추론: 프레임 1개 latent [B, 1, ae_latent_dim] 만 GRU 에 넣고 hidden state 유지
+        gru_out, hidden = self.gru(latent, hidden)  # [B, 1, gru_hidden_dim], [num_layers, B, gru_hidden_dim]
+        return gru_out, hidden
+
     def forward(self, x):
         B, seq, C, H, W = x.shape
         x = x.view(B*seq, C, H, W)
@@ -65,11 +85,7 @@ class CNNAE_LSTM_Transformer(nn.Module):
         feat_recon = self.ae_decoder(latent) # [B*seq, 256]
 
         latent_seq = latent.view(B, seq, -1)
-        gru_out, _ = self.gru(latent_seq)     # [B, seq, gru_hidden_dim]
-
-        trans_out = self.transformer(gru_out) # [B, seq, transformer_d_model]
-        final_out = trans_out[:, -1, :]       # [B, transformer_d_model]
-        logits = self.fc_cls(final_out)
+        logits = self.classify(latent_seq)
         
         return logits, feat_orig, feat_recon
 
@@ -7,6 +7,61 @@ INFERENCE_DURATION = Summary('inference_duration_seconds', 'Time spent in infere
 # 총 추론 호출 수
 INFERENCE_REQUESTS = Counter('inference_requests_total', 'Total number of inference calls')
 
+# 동적 배치 크기 / 스케줄러 큐 대기 시간
+INFERENCE_BATCH_SIZE = Histogram('inference_batch_size', 'Number of windows per batched forward', buckets=(1, 2, 4, 8, 16, 32, 64))
+INFERENCE_QUEUE_WAIT = Summary('inference_queue_wait_seconds', 'Time a window waits in the inference scheduler queue')
+
+# 프레임 latent 캐시 적중/미스 (프레임 단위)
+FEATURE_CACHE_HITS = Counter('feature_cache_hits_total', 'Frames whose latent vector was reused from the cache')
+FEATURE_CACHE_MISSES = Counter('feature_cache_misses_total', 'Frames that had to go through the CNN backbone')
+
+# 움직임 게이트: 추론한 윈도우 / 생략한 윈도우 (스트리밍 모드는 프레임 단위)
+WINDOWS_INFERRED = Counter('motion_gate_windows_inferred_total', 'Windows sent to inference by the motion gate')
+WINDOWS_SKIPPED = Counter('motion_gate_windows_skipped_total', 'Windows skipped by the motion gate (no motion)')
+
+# 수신 파이프라인 단계별 큐 길이 / 큐 대기 시간 / 처리 시간 / 큐 가득 차서 버린 프레임
+PIPELINE_QUEUE_DEPTH = Gauge('pipeline_queue_depth', 'Items waiting in each ingest pipeline stage queue', ['stage'])
+PIPELINE_STAGE_WAIT = Summary('pipeline_stage_wait_seconds', 'Time an item waits in a pipeline stage queue', ['stage'])
+PIPELINE_STAGE_DURATION = Histogram('pipeline_stage_duration_seconds', 'Time spent processing an item in a pipeline stage', ['stage'])
+PIPELINE_DROPPED = Counter('pipeline_dropped_total', 'Items rejected because a pipeline stage queue was full', ['stage'])
+
+# 재정렬 버퍼: 순서가 뒤바뀌어 도착한 프레임 / 이미 적용된 구간보다 늦게 와서 버린 프레임
+FRAMES_REORDERED = Counter('frames_reordered_total', 'Frames that arrived out of timestamp order and were reordered')
+LATE_FRAMES_DROPPED = Counter('late_frames_dropped_total', 'Frames dropped because they arrived after a newer frame was applied')
+REORDER_CLOCK_RESETS = Counter('reorder_clock_resets_total', 'Reorder buffers reset because a camera clock jumped backwards')
+
+# 디코딩 프로세스 풀: 남은 공유 메모리 슬롯 / 슬롯이 없어 로컬 디코딩한 프레임
+DECODE_POOL_FREE_SLOTS = Gauge('decode_pool_free_slots', 'Free shared-memory frame slots in the decode process pool')
+DECODE_POOL_FALLBACK = Counter('decode_pool_fallback_total', 'Frames decoded in-process instead of the decode process pool', ['reason'])  # no_slot / pool_broken
+
+# 수용 제어: in-flight 프레임 수 / 거절한 프레임 (일반 / 낙상 의심 카메라) / 큐에서 오래 기다려 버린 프레임
+ADMISSION_INFLIGHT = Gauge('admission_inflight_frames', 'Frames in flight when the last admission decision was made')
+ADMISSION_REJECTED = Counter('admission_rejected_total', 'Frames rejected with RESOURCE_EXHAUSTED by admission control', ['priority'])
+FRAMES_SHED = Counter('frames_shed_total', 'Queued frames from non-suspected cameras dropped because they waited too long')
+
+# 카메라 상태 레지스트리: 활성 카메라 수 / 카메라별 · 전체 상태 메모리 / 제거된 카메라 (idle / memory)
+LIVE_CAMERAS = Gauge('live_cameras', 'Cameras with in-memory state')
+CAMERA_STATE_BYTES = Gauge('camera_state_bytes', 'Approximate bytes of in-memory state per camera', ['serial_number'])
+CAMERA_STATE_BYTES_TOTAL = Gauge('camera_state_bytes_total', 'Approximate bytes of in-memory state over all cameras')
+CAMERAS_EVICTED = Counter('cameras_evicted_total', 'Camera states evicted from the registry', ['reason'])
+
+# 클러스터: ring 의 노드 수 / 카메라 상태 handoff (out: 넘겨줌, in: 넘겨받음)
+CLUSTER_NODES = Gauge('cluster_nodes', 'Nodes currently in the consistent-hash ring')
+CLUSTER_HANDOFFS = Counter('cluster_handoffs_total', 'Camera states handed off between cluster nodes', ['direction'])
+
+# 프레임 저장 write-behind: flush 1번의 프레임 수 / 소요 시간 / 대기 프레임 / 버린 프레임 (overflow / redis_error)
+FRAME_STORE_FLUSH_SIZE = Histogram('frame_store_flush_size', 'Frames written per frame-store flush', buckets=(1, 4, 16, 64, 128, 256, 512))
+FRAME_STORE_FLUSH_DURATION = Histogram('frame_store_flush_duration_seconds', 'Time spent in one pipelined frame-store flush')
+FRAME_STORE_PENDING = Gauge('frame_store_pending', 'Frames waiting in the write-behind buffer')
+FRAME_STORE_DROPPED = Counter('frame_store_dropped_total', 'Frames dropped before reaching the frame store', ['reason'])
+# 프레임 보관소에 남아 있는 프레임 bytes (카메라별 / 전체, tier: hot / cold)
+FRAME_STORE_BYTES = Gauge('frame_store_bytes', 'Bytes of pre-roll frames held per camera', ['serial_number', 'tier'])
+FRAME_STORE_BYTES_TOTAL = Gauge('frame_store_bytes_total', 'Bytes of pre-roll frames held over all cameras', ['tier'])
+
+# 카메라 상태 snapshot: 저장 / 복원(warm: 프레임까지, cooldown: 쿨다운만) / 실패 횟수, 전체 저장 소요 시간
+CAMERA_SNAPSHOTS = Counter('camera_snapshots_total', 'Camera state snapshots saved or restored', ['operation'])
+SNAPSHOT_DURATION = Histogram('snapshot_duration_seconds', 'Time to snapshot all recently active cameras')
+
 # 이벤트 발생 횟수
 EVENT_TRIGGERED = Counter('event_triggered_total', 'Total number of fall events detected')
 
@@ -0,0 +1,42 @@
+# app/motion.py
+# [설명] : 저해상도 프레임 차분 기반 움직임 게이트 (움직임 없는 방은 추론 생략 / 주기 축소)
+import numpy as np
+import cv2
+from constants import (
+    MOTION_GATE, MOTION_GATE_SIZE, MOTION_PIXEL_DELTA, MOTION_THRESHOLD,
+    MOTION_HOLD_WINDOWS, IDLE_INFERENCE_EVERY
+)
+
+class MotionGate:
+    """
+    - score : 직전 프레임 대비 변화 픽셀 비율 (MOTION_GATE_SIZE x MOTION_GATE_SIZE 흑백, |Δ| > MOTION_PIXEL_DELTA)
+    - should_infer : 윈도우(또는 스트리밍 프레임) 안에 움직임이 있으면 즉시 추론,
+      움직임이 멈춘 뒤에도 MOTION_HOLD_WINDOWS 번은 계속 추론 (쓰러진 뒤 정지 상태 확인),
+      그 이후에는 IDLE_INFERENCE_EVERY 번에 한 번만 추론
+    """
+    def __init__(self):
+        self.prev = None
+        self.idle_runs = 0
+
+    def reset(self):
+        self.prev = None
+        self.idle_runs = 0
+
+    def score(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, (MOTION_GATE_SIZE, MOTION_GATE_SIZE), interpolation=cv2.INTER_AREA)
+        prev, self.prev = self.prev, small
+        if prev is None:
+            return 1.0  # 비교 대상이 없으면 움직임으로 간주
+        changed = cv2.absdiff(small, prev) > MOTION_PIXEL_DELTA
+        return float(np.count_nonzero(changed)) / changed.size
+
+    def should_infer(self, scores, suspected):
+        # suspected: 최근 판단 중 양성이 있으면 게이트를 적용하지 않음
+        if not MOTION_GATE or suspected or max(scores) >= MOTION_THRESHOLD:
+            self.idle_runs = 0
+            return True
+        self.idle_runs += 1
+        if self.idle_runs <= MOTION_HOLD_WINDOWS:
+            return True
+        return (self.idle_runs - MOTION_HOLD_WINDOWS) % IDLE_INFERENCE_EVERY == 0
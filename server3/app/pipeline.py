@@ -0,0 +1,211 @@
+# app/pipeline.py
+# [설명] : 프레임 수신 파이프라인 (ingest -> decode -> window -> inference -> decision)
+#   - SendFrame / StreamFrames 는 ingest 큐에 넣고 바로 응답 (모델 forward 를 RPC 안에서 기다리지 않음)
+#   - 단계 사이는 bounded queue, 큐가 가득 차면 ingest 단계에서 거절 (RESOURCE_EXHAUSTED)
+#   - inference 단계는 InferenceScheduler (동적 배치), 결과는 Future 콜백으로 decision 큐에 전달
+import queue
+import threading
+import time
+import zlib
+import logging
+from monitoring import PIPELINE_QUEUE_DEPTH, PIPELINE_STAGE_WAIT, PIPELINE_STAGE_DURATION, PIPELINE_DROPPED
+from constants import (
+    PIPELINE_QUEUE_SIZE, PIPELINE_INGEST_WORKERS, PIPELINE_DECODE_WORKERS,
+    PIPELINE_WINDOW_LANES, PIPELINE_IDLE_INTERVAL, CAMERA_IDLE_TTL, ADMISSION_PRIORITY_WAIT
+)
+from reorder import ReorderBuffer
+from admission import Overloaded
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+ch = logging.StreamHandler()
+ch.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+ch.setFormatter(formatter)
+logger.addHandler(ch)
+
+class PipelineFull(Overloaded):
+    """ingest 큐가 가득 차 프레임을 받을 수 없음 (RPC 에는 RESOURCE_EXHAUSTED 로 응답)"""
+
+class Stage:
+    """
+    bounded queue + 워커 스레드 N 개 (워커마다 큐 1개, serial_number 해시로 워커 선택)
+    - 같은 카메라 프레임은 항상 같은 워커가 순서대로 처리 (StreamFrames 의 프레임 순서 유지)
+    - handler(item) 의 반환값 (serial_number, item) 이 None 이 아니면 next_stage 로 전달
+      (가득 차 있으면 빌 때까지 대기 = backpressure)
+    - 단계별 큐 길이 / 큐 대기 시간 / 처리 시간을 Prometheus 로 노출
+    """
+    def __init__(self, name, handler, workers=1, maxsize=PIPELINE_QUEUE_SIZE, next_stage=None, idle=None, shed=None):
+        self.name = name
+        self.handler = handler
+        self.next_stage = next_stage
+        self.shed = shed  # shed(item, waited): True 면 처리하지 않고 버림 (과부하 시 오래 기다린 프레임)
+        self.idle = idle  # idle(lane): PIPELINE_IDLE_INTERVAL 마다 워커별로 호출 (재정렬 버퍼 flush 등)
+        self.queues = [queue.Queue(maxsize=max(maxsize // workers, 1)) for _ in range(workers)]
+        self.depth = PIPELINE_QUEUE_DEPTH.labels(stage=name)
+        self.wait = PIPELINE_STAGE_WAIT.labels(stage=name)
+        self.duration = PIPELINE_STAGE_DURATION.labels(stage=name)
+        self.threads = [
+            threading.Thread(target=self._run, args=(i,), name=f"pipeline-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def qsize(self):
+        return sum(q.qsize() for q in self.queues)
+
+    def lane(self, serial_number):
+        return zlib.crc32(serial_number.encode()) % len(self.queues)
+
+    def put(self, serial_number, item, block=True, timeout=None):
+        q = self.queues[self.lane(serial_number)]
+        try:
+            q.put((item, time.monotonic()), block=block, timeout=timeout)
+        except queue.Full:
+            PIPELINE_DROPPED.labels(stage=self.name).inc()
+            return False
+        self.depth.set(self.qsize())
+        return True
+
+    def stop(self):
+        for q in self.queues:
+            q.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def _run(self, lane):
+        q = self.queues[lane]
+        last_idle = time.monotonic()
+        while True:
+            if self.idle is not None and time.monotonic() - last_idle >= PIPELINE_IDLE_INTERVAL:
+                last_idle = time.monotonic()
+                self._call(self.idle, lane)
+            try:
+                entry = q.get(timeout=PIPELINE_IDLE_INTERVAL if self.idle is not None else None)
+            except queue.Empty:
+                continue
+            if entry is None:
+                return
+            item, enqueued_at = entry
+            self.depth.set(self.qsize())
+            start = time.monotonic()
+            self.wait.observe(start - enqueued_at)
+            if self.shed is not None and self.shed(item, start - enqueued_at):
+                continue
+            try:
+                result = self.handler(item)
+            except Exception as e:
+                logger.exception(f"Pipeline stage '{self.name}' failed: {e}")
+                continue
+            finally:
+                self.duration.observe(time.monotonic() - start)
+            if result is not None and self.next_stage is not None:
+                self.next_stage.put(*result)
+
+    def _call(self, fn, lane):
+        try:
+            fn(lane)
+        except Exception as e:
+            logger.exception(f"Pipeline stage '{self.name}' idle handler failed: {e}")
+
+class FramePipeline:
+    """
+    - ingest   : Redis 원본 프레임 저장 (알림 영상용)
+    - decode   : JPEG 축소 디코딩 + ROI crop (decode_pool 이 있으면 프로세스 풀 + 공유 메모리 슬롯)
+    - window   : 카메라별 timestamp 재정렬 -> ring buffer / 움직임 게이트 / 추론 요청 (submit 만 하고 결과는 기다리지 않음)
+                 카메라는 해시로 lane 1개에 고정되고, accumulator / 재정렬 버퍼는 그 lane 스레드만 만짐 (lock 없음)
+    - inference: InferenceScheduler 가 여러 카메라 요청을 배치로 실행
+    - decision : 확률 임계치 판단 + 이벤트 트리거
+    단계마다 같은 카메라는 같은 워커로 가므로 카메라별 프레임/결과 순서가 유지됨
+    """
+    def __init__(self, servicer, decode_pool=None):
+        self.servicer = servicer
+        self.decode_pool = decode_pool
+        self.decision = Stage("decision", self._decide)
+        self.reorder = [dict() for _ in range(PIPELINE_WINDOW_LANES)]  # lane 별 {serial_number: ReorderBuffer}
+        self.window = Stage("window", self._window, workers=PIPELINE_WINDOW_LANES, idle=self._flush)
+        self.decode = Stage("decode", self._decode, workers=PIPELINE_DECODE_WORKERS, next_stage=self.window, shed=self._shed)
+        self.ingest = Stage("ingest", self._ingest, workers=PIPELINE_INGEST_WORKERS, next_stage=self.decode, shed=self._shed)
+
+    def depth(self):
+        # 아직 ring buffer 에 들어가지 않은 프레임 수 (admission 의 in-flight 기준)
+        return self.ingest.qsize() + self.decode.qsize() + self.window.qsize()
+
+    def submit(self, request):
+        # RPC 스레드/이벤트 루프에서 호출: 큐에 넣기만 하고 즉시 반환
+        # 낙상 의심 카메라는 같은 lane 의 다른 카메라가 큐를 채워도 거절하지 않고 잠깐 기다림 (ADMISSION_PRIORITY_WAIT)
+        suspected = self.servicer.is_suspected(request.serial_number)
+        if not self.ingest.put(request.serial_number, request, block=suspected, timeout=ADMISSION_PRIORITY_WAIT if suspected else None):
+            raise PipelineFull(f"Ingest queue full, frame {request.frame_id} from {request.serial_number} dropped")
+
+    def stop(self):
+        for stage in (self.ingest, self.decode, self.window, self.decision):
+            stage.stop()
+        if self.decode_pool is not None:
+            self.decode_pool.close()
+
+    def _shed(self, request, waited):
+        # 디코딩 전에 버려야 CPU 도 아낌 (ingest / decode 단계에서만 적용)
+        admission = self.servicer.admission
+        return admission is not None and admission.shed(request.serial_number, waited)
+
+    def _ingest(self, request):
+        self.servicer.dispatcher.add_to_queue(request.serial_number, request)
+        return request.serial_number, request
+
+    def _decode(self, request):
+        # 디코딩 풀이 있으면 224x224 결과가 공유 메모리 슬롯으로 돌아옴 (window 단계에서 ring buffer 로 복사 후 반납)
+        slot = None
+        if self.decode_pool is not None:
+            frame, slot = self.decode_pool.decode(
+                request.image, request.roi_x, request.roi_y, request.roi_w, request.roi_h
+            )
+        else:
+            frame = self.servicer.preprocess_frame(
+                request.image,
+                request.roi_x,
+                request.roi_y,
+                request.roi_w,
+                request.roi_h
+            )
+        return request.serial_number, (request.serial_number, (frame, slot), request.timestamp)
+
+    def _window(self, item):
+        serial_number, frame, timestamp = item
+        buffers = self.reorder[self.window.lane(serial_number)]
+        buffer = buffers.get(serial_number)
+        if buffer is None:
+            buffer = buffers[serial_number] = ReorderBuffer(on_drop=self._release)
+        for ts, ready in buffer.push(timestamp, frame):
+            self._apply(serial_number, ready, ts)
+
+    def _flush(self, lane):
+        # 프레임이 끊긴 카메라의 재정렬 버퍼에 남은 프레임 처리, CAMERA_IDLE_TTL 이 지난 카메라의 버퍼는 제거
+        now = time.monotonic()
+        buffers = self.reorder[lane]
+        for serial_number, buffer in list(buffers.items()):
+            for ts, ready in buffer.flush(now):
+                self._apply(serial_number, ready, ts)
+            if now - buffer.updated > CAMERA_IDLE_TTL:
+                del buffers[serial_number]
+
+    def _release(self, decoded):
+        if self.decode_pool is not None:
+            self.decode_pool.release(decoded[1])
+
+    def _apply(self, serial_number, decoded, timestamp):
+        accumulator = self.servicer.get_accumulator(serial_number)
+        try:
+            job = accumulator.collect(decoded[0], timestamp)
+        finally:
+            self._release(decoded)
+        if job is None:
+            return
+        future = accumulator.submit(job)
+        future.add_done_callback(lambda f: self.decision.put(serial_number, (accumulator, job, f)))
+
+    def _decide(self, item):
+        accumulator, job, future = item
+        accumulator.finish(job, future.result())
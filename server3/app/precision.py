@@ -0,0 +1,101 @@
+# app/precision.py
+# [설명] : CPU 저정밀 추론 모드 (eager 백엔드 전용)
+#   - "fp32"         : 기존 그대로
+#   - "int8_dynamic" : Linear / GRU 동적 int8 양자화 (가중치 int8, 활성값은 실행 시 양자화)
+#   - "int8_static"  : CNN(BottleneckSE conv stack) 정적 int8 PTQ (calibration 필요) + 나머지는 int8_dynamic
+#   - "bf16"         : torch.autocast(cpu, bfloat16) - AVX512_BF16 / AMX 지원 CPU 에서만 활성화
+import os
+import copy
+import logging
+import torch
+import torch.nn as nn
+from torch.ao.quantization import quantize_dynamic, get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+ch = logging.StreamHandler()
+ch.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+ch.setFormatter(formatter)
+logger.addHandler(ch)
+
+PRECISIONS = ("fp32", "int8_dynamic", "int8_static", "bf16")
+
+def cpu_supports_bf16():
+    # bf16 연산 유닛이 없는 CPU 에서 autocast 하면 fp32 보다 느려짐
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+def quantize_dynamic_int8(backend):
+    # Transformer 내부 Linear 는 fast-path 와 호환되지 않아 제외 (GRU / fc_cls / CNN SE fc / ae_encoder 만)
+    backend.encoder = quantize_dynamic(backend.encoder, {nn.Linear}, dtype=torch.qint8)
+    backend.classifier = quantize_dynamic(backend.classifier, {"gru", "fc_cls"}, dtype=torch.qint8)
+    return backend
+
+def quantize_static_int8(backend, calibration_frames, batch_size=32):
+    # FX graph mode PTQ: observer 삽입 -> calibration 프레임 통과 -> int8 conv 로 변환
+    torch.backends.quantized.engine = "x86"
+    cnn = copy.deepcopy(backend.encoder.cnn).eval()
+    prepared = prepare_fx(cnn, get_default_qconfig_mapping("x86"), (calibration_frames[:1],))
+    with torch.no_grad():
+        for i in range(0, len(calibration_frames), batch_size):
+            prepared(calibration_frames[i:i + batch_size])
+    backend.encoder.cnn = convert_fx(prepared)
+    backend.encoder.ae_encoder = quantize_dynamic(backend.encoder.ae_encoder, {nn.Linear}, dtype=torch.qint8)
+    backend.classifier = quantize_dynamic(backend.classifier, {"gru", "fc_cls"}, dtype=torch.qint8)
+    return backend
+
+class Bf16Autocast:
+    """
+    backend.encode / classify 를 bf16 autocast 로 감싸고 결과는 fp32 로 반환
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = f"{backend.name}+bf16"
+
+    def encode(self, frames):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            return self.backend.encode(frames).float()
+
+    def classify(self, latent_seq):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            return self.backend.classify(latent_seq).float()
+
+def load_calibration_frames(calibration_dir, preprocess_batch, limit):
+    # calibration_dir: ROI crop 이미지(jpg/png) 폴더
+    import cv2
+    if not calibration_dir or not os.path.isdir(calibration_dir):
+        raise ValueError(f"int8_static requires a calibration image directory, got: {calibration_dir}")
+    names = sorted(n for n in os.listdir(calibration_dir) if n.lower().endswith((".jpg", ".jpeg", ".png")))[:limit]
+    frames = [cv2.imread(os.path.join(calibration_dir, n), cv2.IMREAD_COLOR) for n in names]
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        raise ValueError(f"No calibration images found in {calibration_dir}")
+    return preprocess_batch(frames)
+
+def apply_precision(backend, precision, calibration_frames=None):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown inference precision: {precision} (available: {', '.join(PRECISIONS)})")
+    if precision == "fp32":
+        return backend
+    if backend.name != "eager":
+        raise ValueError(f"Precision mode {precision} is only supported with the eager backend (got {backend.name})")
+
+    if precision == "bf16":
+        if not cpu_supports_bf16():
+            logger.warning("bf16 requested but CPU has no AVX512_BF16/AMX support - falling back to fp32")
+            return backend
+        backend = Bf16Autocast(backend)
+    elif precision == "int8_dynamic":
+        backend = quantize_dynamic_int8(backend)
+    elif precision == "int8_static":
+        backend = quantize_static_int8(backend, calibration_frames)
+
+    logger.info(f"Inference precision: {precision}")
+    return backend
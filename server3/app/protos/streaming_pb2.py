@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0fstreaming.proto\x12\tstreaming\"\x95\x01\n\x0c\x46rameMessage\x12\x15\n\rserial_number\x18\x01 \x01(\t\x12\x11\n\ttimestamp\x18\x02 \x01(\x03\x12\x10\n\x08\x66rame_id\x18\x03 \x01(\x05\x12\r\n\x05image\x18\x04 \x01(\x0c\x12\r\n\x05roi_x\x18\x05 \x01(\x05\x12\r\n\x05roi_y\x18\x06 \x01(\x05\x12\r\n\x05roi_w\x18\x07 \x01(\x05\x12\r\n\x05roi_h\x18\x08 \x01(\x05\"\x1a\n\x08Response\x12\x0e\n\x06status\x18\x01 \x01(\t2J\n\rFrameStreamer\x12\x39\n\tSendFrame\x12\x17.streaming.FrameMessage\x1a\x13.streaming.Responseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0fstreaming.proto\x12\tstreaming\"\x95\x01\n\x0c\x46rameMessage\x12\x15\n\rserial_number\x18\x01 \x01(\t\x12\x11\n\ttimestamp\x18\x02 \x01(\x03\x12\x10\n\x08\x66rame_id\x18\x03 \x01(\x05\x12\r\n\x05image\x18\x04 \x01(\x0c\x12\r\n\x05roi_x\x18\x05 \x01(\x05\x12\r\n\x05roi_y\x18\x06 \x01(\x05\x12\r\n\x05roi_w\x18\x07 \x01(\x05\x12\r\n\x05roi_h\x18\x08 \x01(\x05\"%\n\x0cOwnerRequest\x12\x15\n\rserial_number\x18\x01 \x01(\t\"A\n\nOwnerReply\x12\x15\n\rserial_number\x18\x01 \x01(\t\x12\r\n\x05owner\x18\x02 \x01(\t\x12\r\n\x05nodes\x18\x03 \x03(\t\"H\n\x08Response\x12\x0e\n\x06status\x18\x01 \x01(\t\x12,\n\x08settings\x18\x02 \x01(\x0b\x32\x1a.streaming.CaptureSettings\"t\n\tStreamAck\x12\x10\n\x08\x66rame_id\x18\x01 \x01(\x05\x12\x17\n\x0f\x66rames_received\x18\x02 \x01(\x03\x12\x0e\n\x06status\x18\x03 \x01(\t\x12,\n\x08settings\x18\x04 \x01(\x0b\x32\x1a.streaming.CaptureSettings\"g\n\x0f\x43\x61ptureSettings\x12\x17\n\x0frecommended_fps\x18\x01 \x01(\x02\x12\x14\n\x0cjpeg_quality\x18\x02 \x01(\x05\x12\x11\n\tmax_width\x18\x03 \x01(\x05\x12\x12\n\nmax_height\x18\x04 \x01(\x05\x32\xcc\x01\n\rFrameStreamer\x12\x39\n\tSendFrame\x12\x17.streaming.FrameMessage\x1a\x13.streaming.Response\x12\x41\n\x0cStreamFrames\x12\x17.streaming.FrameMessage\x1a\x14.streaming.StreamAck(\x01\x30\x01\x12=\n\x0bLookupOwner\x12\x17.streaming.OwnerRequest\x1a\x15.streaming.OwnerReplyb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -33,8 +33,16 @@ if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_FRAMEMESSAGE']._serialized_start=31
   _globals['_FRAMEMESSAGE']._serialized_end=180
-  _globals['_RESPONSE']._serialized_start=182
-  _globals['_RESPONSE']._serialized_end=208
-  _globals['_FRAMESTREAMER']._serialized_start=210
-  _globals['_FRAMESTREAMER']._serialized_end=284
+  _globals['_OWNERREQUEST']._serialized_start=182
+  _globals['_OWNERREQUEST']._serialized_end=219
+  _globals['_OWNERREPLY']._serialized_start=221
+  _globals['_OWNERREPLY']._serialized_end=286
+  _globals['_RESPONSE']._serialized_start=288
+  _globals['_RESPONSE']._serialized_end=360
+  _globals['_STREAMACK']._serialized_start=362
+  _globals['_STREAMACK']._serialized_end=478
+  _globals['_CAPTURESETTINGS']._serialized_start=480
+  _globals['_CAPTURESETTINGS']._serialized_end=583
+  _globals['_FRAMESTREAMER']._serialized_start=586
+  _globals['_FRAMESTREAMER']._serialized_end=790
 # @@protoc_insertion_point(module_scope)
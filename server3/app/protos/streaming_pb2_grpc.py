@@ -39,6 +39,16 @@ class FrameStreamerStub(object):
                 request_serializer=streaming__pb2.FrameMessage.SerializeToString,
                 response_deserializer=streaming__pb2.Response.FromString,
                 _registered_method=True)
+        self.StreamFrames = channel.stream_stream(
+                '/streaming.FrameStreamer/StreamFrames',
+                request_serializer=streaming__pb2.FrameMessage.SerializeToString,
+                response_deserializer=streaming__pb2.StreamAck.FromString,
+                _registered_method=True)
+        self.LookupOwner = channel.unary_unary(
+                '/streaming.FrameStreamer/LookupOwner',
+                request_serializer=streaming__pb2.OwnerRequest.SerializeToString,
+                response_deserializer=streaming__pb2.OwnerReply.FromString,
+                _registered_method=True)
 
 
 class FrameStreamerServicer(object):
@@ -50,6 +60,20 @@ class FrameStreamerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamFrames(self, request_iterator, context):
+        """카메라당 장기 연결 1개: 프레임을 계속 push 하고, 서버는 드문 ack / 제어 메시지만 응답
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def LookupOwner(self, request, context):
+        """클러스터 모드: 카메라 담당 노드 조회 (ingress 라우팅용, 담당이 아닌 노드로 보내면 FAILED_PRECONDITION + cluster-owner 메타데이터)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_FrameStreamerServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -58,6 +82,16 @@ def add_FrameStreamerServicer_to_server(servicer, server):
                     request_deserializer=streaming__pb2.FrameMessage.FromString,
                     response_serializer=streaming__pb2.Response.SerializeToString,
             ),
+            'StreamFrames': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamFrames,
+                    request_deserializer=streaming__pb2.FrameMessage.FromString,
+                    response_serializer=streaming__pb2.StreamAck.SerializeToString,
+            ),
+            'LookupOwner': grpc.unary_unary_rpc_method_handler(
+                    servicer.LookupOwner,
+                    request_deserializer=streaming__pb2.OwnerRequest.FromString,
+                    response_serializer=streaming__pb2.OwnerReply.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'streaming.FrameStreamer', rpc_method_handlers)
@@ -95,3 +129,57 @@ class FrameStreamer(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def StreamFrames(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/streaming.FrameStreamer/StreamFrames',
+            streaming__pb2.FrameMessage.SerializeToString,
+            streaming__pb2.StreamAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def LookupOwner(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/streaming.FrameStreamer/LookupOwner',
+            streaming__pb2.OwnerRequest.SerializeToString,
+            streaming__pb2.OwnerReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,14 @@
+# app/redis_pool.py
+# [설명] : 프로세스 전체가 공유하는 Redis 연결 풀 (카메라마다 클라이언트 / 연결을 만들지 않음)
+#   - BlockingConnectionPool: 연결이 모두 사용 중이면 바로 실패하지 않고 REDIS_POOL_TIMEOUT 까지 기다림
+#     (부하가 몰릴 때 프레임 저장 / 쿨다운 lock 이 ConnectionError 로 실패하지 않도록)
+import redis
+from constants import REDIS_HOST, REDIS_PORT, REDIS_MAX_CONNECTIONS, REDIS_POOL_TIMEOUT
+
+POOL = redis.BlockingConnectionPool(
+    host=REDIS_HOST, port=REDIS_PORT, db=0, max_connections=REDIS_MAX_CONNECTIONS, timeout=REDIS_POOL_TIMEOUT
+)
+
+def get_redis():
+    # redis.Redis 는 가벼운 래퍼, 실제 연결은 POOL 에서 빌려 씀
+    return redis.Redis(connection_pool=POOL)
@@ -0,0 +1,127 @@
+# app/registry.py
+# [설명] : 카메라별 상태(FrameAccumulator) 레지스트리
+#   - 생성할 때만 lock (hot path 는 dict 조회 + last_active 기록만)
+#   - 주기적으로 (REGISTRY_SWEEP_INTERVAL) 카메라별 메모리 계산 -> 메트릭 갱신
+#       1) CAMERA_IDLE_TTL 동안 프레임이 없던 카메라 제거
+#       2) 전체가 CAMERA_MEMORY_BUDGET 을 넘으면 가장 오래 전에 활동한 카메라부터 제거
+#   - 제거 시 latent 캐시 / 스트리밍 상태 / 카메라 label Prometheus series 도 같이 정리
+#     (그 밖의 카메라별 자원은 evict_hooks 에 등록한 함수로 정리: 예) shm 프레임 ring)
+import threading
+import time
+import logging
+from monitoring import (
+    LIVE_CAMERAS, CAMERA_STATE_BYTES, CAMERA_STATE_BYTES_TOTAL, CAMERAS_EVICTED,
+    FRAME_BUFFER_LENGTH, INFERENCE_OUTPUT_PROB_SUMMARY, EVENT_COOLDOWN_REMAINING, REDIS_QUEUE_LENGTH
+)
+from constants import CAMERA_IDLE_TTL, CAMERA_MEMORY_BUDGET, REGISTRY_SWEEP_INTERVAL
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+ch = logging.StreamHandler()
+ch.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+ch.setFormatter(formatter)
+logger.addHandler(ch)
+
+# 카메라 serial_number 를 label 로 쓰는 메트릭 (카메라 제거 시 series 삭제)
+CAMERA_LABELED_METRICS = (
+    FRAME_BUFFER_LENGTH, INFERENCE_OUTPUT_PROB_SUMMARY, EVENT_COOLDOWN_REMAINING, REDIS_QUEUE_LENGTH, CAMERA_STATE_BYTES
+)
+
+class CameraRegistry:
+    """
+    - get(serial)            : 있으면 accumulator, 없으면 None (만들지 않음)
+    - get_or_create(serial)  : 없으면 factory(serial) 로 생성
+    - sweep()                : TTL / 메모리 예산 기준 제거 (백그라운드 스레드에서 주기 실행)
+    - evict_hooks            : 카메라 제거 시 hook(serial) 호출
+    """
+    def __init__(self, factory, inference_engine, ttl=CAMERA_IDLE_TTL, budget=CAMERA_MEMORY_BUDGET,
+                 sweep_interval=REGISTRY_SWEEP_INTERVAL):
+        self.factory = factory
+        self.inference_engine = inference_engine
+        self.ttl = ttl
+        self.budget = budget
+        self.accumulators = {}
+        self.evict_hooks = []
+        self.lock = threading.Lock()
+        self.thread = None
+        if sweep_interval > 0:
+            self.thread = threading.Thread(target=self._run, args=(sweep_interval,), name="camera-registry", daemon=True)
+            self.thread.start()
+
+    def get(self, serial_number):
+        return self.accumulators.get(serial_number)
+
+    def get_or_create(self, serial_number):
+        accumulator = self.accumulators.get(serial_number)
+        if accumulator is not None:
+            return accumulator
+        # 생성할 때만 lock (동시 RPC 가 같은 카메라 accumulator 를 두 개 만드는 것 방지)
+        with self.lock:
+            accumulator = self.accumulators.get(serial_number)
+            if accumulator is None:
+                accumulator = self.accumulators[serial_number] = self.factory(serial_number)
+                LIVE_CAMERAS.set(len(self.accumulators))
+        return accumulator
+
+    def __len__(self):
+        return len(self.accumulators)
+
+    def state_bytes(self, serial_number, accumulator):
+        return accumulator.nbytes() + self.inference_engine.state_nbytes(serial_number)
+
+    def sweep(self, now=None):
+        now = time.monotonic() if now is None else now
+        cameras = [
+            (accumulator.last_active, serial_number, self.state_bytes(serial_number, accumulator))
+            for serial_number, accumulator in list(self.accumulators.items())
+        ]
+
+        live = []
+        for last_active, serial_number, nbytes in cameras:
+            if now - last_active > self.ttl:
+                self.evict(serial_number, "idle")
+            else:
+                live.append((last_active, serial_number, nbytes))
+
+        total = sum(nbytes for _, _, nbytes in live)
+        for last_active, serial_number, nbytes in sorted(live):
+            if total <= self.budget:
+                break
+            self.evict(serial_number, "memory")
+            total -= nbytes
+
+        for _, serial_number, nbytes in live:
+            if serial_number in self.accumulators:
+                CAMERA_STATE_BYTES.labels(serial_number=serial_number).set(nbytes)
+        CAMERA_STATE_BYTES_TOTAL.set(total)
+        LIVE_CAMERAS.set(len(self.accumulators))
+
+    def evict(self, serial_number, reason):
+        with self.lock:
+            accumulator = self.accumulators.pop(serial_number, None)
+        if accumulator is None:
+            return
+        self.inference_engine.latent_cache.drop(serial_number)
+        self.inference_engine.reset_stream(serial_number)
+        for metric in CAMERA_LABELED_METRICS:
+            try:
+                metric.remove(serial_number)
+            except KeyError:
+                pass
+        for hook in self.evict_hooks:
+            try:
+                hook(serial_number)
+            except Exception as e:
+                logger.exception(f"[{serial_number}] Evict hook failed: {e}")
+        CAMERAS_EVICTED.labels(reason=reason).inc()
+        logger.info(f"[{serial_number}] Camera state evicted ({reason})")
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.exception(f"Camera registry sweep failed: {e}")
@@ -0,0 +1,65 @@
+# app/reorder.py
+# [설명] : 카메라별 timestamp 재정렬 버퍼 (동시 SendFrame 호출로 순서가 뒤바뀐 프레임을 jitter window 안에서 바로잡음)
+import heapq
+import time
+import logging
+from monitoring import LATE_FRAMES_DROPPED, FRAMES_REORDERED, REORDER_CLOCK_RESETS
+from constants import REORDER_JITTER_MS, REORDER_MAX_FRAMES, REORDER_MAX_HOLD, REORDER_CLOCK_RESET_MS
+
+logger = logging.getLogger(__name__)
+
+class ReorderBuffer:
+    """
+    - push  : 프레임을 timestamp(ms) 순으로 보관하다가, 가장 최근 프레임보다 jitter_ms 이상 오래된 것부터
+              (또는 max_frames 를 넘으면 가장 오래된 것부터) 순서대로 내보냄
+    - 이미 내보낸 timestamp 이하로 늦게 도착했거나 중복된 프레임은 버림 (LATE_FRAMES_DROPPED)
+    - 내보낸 timestamp 보다 clock_reset_ms 넘게 과거면 카메라 시계가 뒤로 간 것: 보류 중인 프레임을 내보내고
+      새 시계 기준으로 다시 시작 (그러지 않으면 이후 프레임이 전부 늦은 프레임으로 버려짐)
+    - flush : 카메라가 max_hold 초 동안 새 프레임을 보내지 않으면 남은 프레임을 모두 내보냄
+    - 한 카메라의 버퍼는 항상 같은 lane 스레드만 만지므로 lock 없음
+    """
+    def __init__(self, jitter_ms=REORDER_JITTER_MS, max_frames=REORDER_MAX_FRAMES, max_hold=REORDER_MAX_HOLD, on_drop=None,
+                 clock_reset_ms=REORDER_CLOCK_RESET_MS):
+        self.on_drop = on_drop  # on_drop(item): 버린 프레임 정리 (예: 공유 메모리 슬롯 반납)
+        self.jitter_ms = jitter_ms
+        self.clock_reset_ms = clock_reset_ms
+        self.max_frames = max_frames
+        self.max_hold = max_hold
+        self.heap = []
+        self.newest = None     # 버퍼에 들어온 가장 최근 timestamp
+        self.released = None   # 마지막으로 내보낸 timestamp
+        self.updated = 0.0
+
+    def push(self, timestamp, item):
+        if self.released is not None and self.released - timestamp > self.clock_reset_ms:
+            REORDER_CLOCK_RESETS.inc()
+            logger.warning(f"Camera clock jumped back {(self.released - timestamp) / 1000:.2f}s, reorder buffer reset")
+            ready = [self._pop() for _ in range(len(self.heap))]
+            self.newest = self.released = None
+            return ready + self.push(timestamp, item)
+        if (self.released is not None and timestamp <= self.released) or any(ts == timestamp for ts, _ in self.heap):
+            LATE_FRAMES_DROPPED.inc()
+            if self.on_drop is not None:
+                self.on_drop(item)
+            return []
+        if self.newest is not None and timestamp < self.newest:
+            FRAMES_REORDERED.inc()
+        heapq.heappush(self.heap, (timestamp, item))
+        self.newest = timestamp if self.newest is None else max(self.newest, timestamp)
+        self.updated = time.monotonic()
+
+        ready = []
+        while self.heap and (self.newest - self.heap[0][0] >= self.jitter_ms or len(self.heap) > self.max_frames):
+            ready.append(self._pop())
+        return ready
+
+    def flush(self, now=None):
+        now = time.monotonic() if now is None else now
+        if not self.heap or now - self.updated < self.max_hold:
+            return []
+        return [self._pop() for _ in range(len(self.heap))]
+
+    def _pop(self):
+        timestamp, item = heapq.heappop(self.heap)
+        self.released = timestamp
+        return timestamp, item
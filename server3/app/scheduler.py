@@ -0,0 +1,113 @@
+# app/scheduler.py
+# [설명] : 여러 카메라의 추론 요청을 모아 하나의 배치로 실행 (dynamic batching)
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from monitoring import INFERENCE_REQUESTS, INFERENCE_BATCH_SIZE, INFERENCE_QUEUE_WAIT
+from constants import MAX_BATCH_SIZE, MAX_BATCH_WAIT
+from detector import PendingStep
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+ch = logging.StreamHandler()
+ch.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+ch.setFormatter(formatter)
+logger.addHandler(ch)
+
+class InferenceScheduler:
+    """
+    카메라별 윈도우 요청을 큐에 모았다가 [B, seq, C, H, W] 배치 한 번으로 추론
+    (스트리밍 모드에서는 카메라별 프레임 1개 요청을 [B, C, H, W] 로 묶음)
+    - max_batch_size 만큼 모이거나 첫 요청 이후 max_wait(초)가 지나면 실행
+    - 각 요청자는 Future 로 자기 logits [1, num_classes] 를 돌려받음
+    """
+    def __init__(self, inference_engine, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_BATCH_WAIT):
+        self.inference_engine = inference_engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self.thread.start()
+
+    def submit(self, serial_number, frames, timestamps):
+        INFERENCE_REQUESTS.inc()
+        future = Future()
+        if len(frames) < self.inference_engine.buffer_size:
+            future.set_result(None)
+            return future
+        # 캐시 조회/전처리는 요청한 스레드에서 병렬로 수행하고, 모델 forward 만 배치로 묶음
+        window = self.inference_engine.prepare_window(serial_number, frames, timestamps)
+        self.queue.put((window, future, time.monotonic()))
+        return future
+
+    def run_window(self, serial_number, frames, timestamps):
+        return self.submit(serial_number, frames, timestamps).result()
+
+    def submit_step(self, serial_number, frame, timestamp):
+        # 스트리밍 모드: 프레임 1개 단위 요청
+        INFERENCE_REQUESTS.inc()
+        future = Future()
+        step = self.inference_engine.prepare_step(serial_number, frame, timestamp)
+        self.queue.put((step, future, time.monotonic()))
+        return future
+
+    def run_step(self, serial_number, frame, timestamp):
+        return self.submit_step(serial_number, frame, timestamp).result()
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _collect(self):
+        first = self.queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            now = time.monotonic()
+            windows, steps = [], []
+            for request, future, enqueued_at in batch:
+                INFERENCE_QUEUE_WAIT.observe(now - enqueued_at)
+                (steps if isinstance(request, PendingStep) else windows).append((request, future))
+            INFERENCE_BATCH_SIZE.observe(len(batch))
+
+            self._execute(self.inference_engine.infer_windows, windows)
+            self._execute(self.inference_engine.infer_steps, steps)
+
+    def _execute(self, infer, items):
+        if not items:
+            return
+        try:
+            logits = infer([request for request, _ in items])
+        except Exception as e:
+            logger.exception(f"Batched inference failed (batch={len(items)}): {e}")
+            for _, future in items:
+                future.set_exception(e)
+            return
+
+        for i, (_, future) in enumerate(items):
+            future.set_result(logits[i:i + 1])
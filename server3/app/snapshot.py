@@ -0,0 +1,195 @@
+# app/snapshot.py
+# [설명] : 카메라별 판단 상태 주기적 snapshot / 재시작 후 복원 (배포 · OOM 재시작 후 warm start)
+#   - SNAPSHOT_INTERVAL 마다 그 사이 프레임을 받은 카메라 상태를 저장 (SNAPSHOT_BACKEND: "redis" / "disk")
+#     : ring buffer 최근 프레임(JPEG) / timestamp / 움직임 점수, 그 프레임들의 latent, 스트리밍 GRU 상태,
+#       pred_history, last_save_time (쿨다운)
+#   - 재시작 후 카메라의 첫 프레임에서 accumulator 를 만들 때 복원
+#     -> 윈도우 모드는 복원한 BUFFER_SIZE - 1 프레임 + 새 프레임 1개로 바로 판단 (latent 는 캐시에서 재사용)
+#   - snapshot 이 SNAPSHOT_MAX_AGE 보다 오래됐으면 쿨다운만 복원 (중단 시간이 길면 collect 가 어차피 버퍼를 비움)
+#   - 직렬화는 np.savez (pickle 사용 안 함)
+import io
+import os
+import time
+import logging
+import threading
+import numpy as np
+import cv2
+import torch
+import redis
+from redis_pool import get_redis
+from monitoring import CAMERA_SNAPSHOTS, SNAPSHOT_DURATION
+from constants import (
+    SNAPSHOT_BACKEND, SNAPSHOT_INTERVAL, SNAPSHOT_DIR, SNAPSHOT_TTL, SNAPSHOT_MAX_AGE, SNAPSHOT_JPEG_QUALITY
+)
+from detector import INPUT_SIZE
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = "snapshot:{}"
+
+def _tensors(tensors):
+    # torch 텐서 묶음 -> (float32 배열, dtype 이름) (numpy 에 bf16 이 없으므로 float32 로 저장 후 복원 시 원래 dtype 으로)
+    stacked = torch.stack(list(tensors))
+    return stacked.float().cpu().numpy(), np.array(str(stacked.dtype).replace("torch.", ""))
+
+def encode_state(accumulator, inference_engine):
+    serial_number = accumulator.serial_number
+    state = accumulator.export_state()
+    jpegs = [cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, SNAPSHOT_JPEG_QUALITY])[1] for frame in state["frames"]]
+    arrays = {
+        "saved_at": np.float64(time.time()),
+        "timestamps": state["timestamps"],
+        "motion_scores": state["motion_scores"],
+        "jpeg": np.concatenate(jpegs) if jpegs else np.zeros(0, dtype=np.uint8),
+        "jpeg_sizes": np.array([len(jpeg) for jpeg in jpegs], dtype=np.int64),
+        "pred_history": np.array(state["pred_history"], dtype=bool),
+        "last_save_time": np.float64(state["last_save_time"]),
+    }
+
+    # 내보낸 프레임의 latent 만 저장 (복원 후 첫 윈도우에서 CNN 재계산 생략)
+    keep = set(state["timestamps"].tolist())
+    pairs = [(ts, latent) for ts, latent in zip(*inference_engine.latent_cache.items(serial_number)) if ts in keep]
+    if pairs:
+        arrays["latent_timestamps"] = np.array([ts for ts, _ in pairs], dtype=np.float64)
+        arrays["latents"], arrays["latent_dtype"] = _tensors(latent for _, latent in pairs)
+
+    stream = inference_engine.export_stream(serial_number)
+    if stream is not None:
+        hidden, context = stream
+        arrays["hidden"], arrays["stream_dtype"] = _tensors([hidden])
+        if context:
+            arrays["context"], _ = _tensors(context)
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+def restore_state(data, accumulator, inference_engine):
+    # 반환값: 프레임 / 추론 상태까지 복원했으면 True, 쿨다운만 복원했으면 False
+    serial_number = accumulator.serial_number
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        accumulator.last_save_time = float(arrays["last_save_time"])
+        if time.time() - float(arrays["saved_at"]) > SNAPSHOT_MAX_AGE:
+            return False
+
+        frames = np.empty((len(arrays["jpeg_sizes"]), INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)
+        jpeg = arrays["jpeg"]
+        offset = 0
+        for i, size in enumerate(arrays["jpeg_sizes"]):
+            frames[i] = cv2.imdecode(jpeg[offset:offset + size], cv2.IMREAD_COLOR)
+            offset += size
+        accumulator.restore_state({
+            "frames": frames,
+            "timestamps": arrays["timestamps"],
+            "motion_scores": arrays["motion_scores"],
+            "pred_history": arrays["pred_history"].tolist(),
+            "last_save_time": accumulator.last_save_time,
+        })
+
+        if "latents" in arrays:
+            dtype = getattr(torch, str(arrays["latent_dtype"]))
+            latents = torch.from_numpy(arrays["latents"]).to(dtype)
+            inference_engine.latent_cache.store(serial_number, arrays["latent_timestamps"].tolist(), list(latents))
+        if "hidden" in arrays:
+            dtype = getattr(torch, str(arrays["stream_dtype"]))
+            context = list(torch.from_numpy(arrays["context"]).to(dtype)) if "context" in arrays else []
+            inference_engine.restore_stream(serial_number, torch.from_numpy(arrays["hidden"][0]).to(dtype), context)
+    return True
+
+class SnapshotStore:
+    """
+    serial_number -> snapshot bytes
+    - "redis" : SNAPSHOT_KEY, SNAPSHOT_TTL 후 만료 (여러 카메라를 pipeline 1번으로 저장)
+    - "disk"  : SNAPSHOT_DIR/<serial>.npz, 임시 파일에 쓴 뒤 os.replace (저장 도중 죽어도 이전 snapshot 유지)
+    """
+    def __init__(self, backend=SNAPSHOT_BACKEND, directory=SNAPSHOT_DIR, ttl=SNAPSHOT_TTL):
+        if backend not in ("redis", "disk"):
+            raise ValueError(f"Unknown snapshot backend: {backend} (available: redis, disk)")
+        self.backend = backend
+        self.directory = directory
+        self.ttl = ttl
+        if backend == "redis":
+            self.redis = get_redis()
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+    def save_many(self, snapshots):
+        if self.backend == "redis":
+            pipe = self.redis.pipeline(transaction=False)
+            for serial_number, data in snapshots.items():
+                pipe.set(SNAPSHOT_KEY.format(serial_number), data, ex=self.ttl)
+            pipe.execute()
+            return
+        for serial_number, data in snapshots.items():
+            path = self._path(serial_number)
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(f"{path}.tmp", path)
+
+    def load(self, serial_number):
+        if self.backend == "redis":
+            return self.redis.get(SNAPSHOT_KEY.format(serial_number))
+        path = self._path(serial_number)
+        if not os.path.exists(path) or time.time() - os.path.getmtime(path) > self.ttl:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _path(self, serial_number):
+        return os.path.join(self.directory, f"{serial_number.replace('/', '_')}.npz")
+
+class Snapshotter:
+    """
+    - save_all() : 마지막 snapshot 이후 프레임을 받은 카메라 상태 저장 (백그라운드 스레드가 SNAPSHOT_INTERVAL 마다 호출)
+    - restore(accumulator) : 저장된 상태가 있으면 복원 (CameraRegistry 가 accumulator 를 새로 만들 때)
+    """
+    def __init__(self, registry, inference_engine, store=None, interval=SNAPSHOT_INTERVAL):
+        self.registry = registry
+        self.inference_engine = inference_engine
+        self.store = store or SnapshotStore()
+        self.saved = {}  # serial -> snapshot 시점의 accumulator.last_active
+        self.thread = threading.Thread(target=self._run, args=(interval,), name="camera-snapshot", daemon=True)
+        self.thread.start()
+
+    @SNAPSHOT_DURATION.time()
+    def save_all(self, force=False):
+        snapshots = {}
+        accumulators = dict(self.registry.accumulators)
+        for serial_number, accumulator in accumulators.items():
+            last_active = accumulator.last_active
+            if not force and self.saved.get(serial_number) == last_active:
+                continue
+            snapshots[serial_number] = encode_state(accumulator, self.inference_engine)
+            self.saved[serial_number] = last_active
+        for serial_number in set(self.saved) - set(accumulators):
+            del self.saved[serial_number]
+        if snapshots:
+            self.store.save_many(snapshots)
+            CAMERA_SNAPSHOTS.labels(operation="saved").inc(len(snapshots))
+
+    def restore(self, accumulator):
+        serial_number = accumulator.serial_number
+        try:
+            data = self.store.load(serial_number)
+            if data is None:
+                return False
+            warm = restore_state(data, accumulator, self.inference_engine)
+        except (redis.RedisError, OSError, ValueError, KeyError) as e:
+            CAMERA_SNAPSHOTS.labels(operation="failed").inc()
+            logger.warning(f"[{serial_number}] Snapshot restore failed: {e}")
+            return False
+        CAMERA_SNAPSHOTS.labels(operation="restored_warm" if warm else "restored_cooldown").inc()
+        logger.info(f"[{serial_number}] Camera state restored from snapshot ({'warm start' if warm else 'cooldown only'})")
+        return warm
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.save_all()
+            except redis.RedisError as e:
+                logger.warning(f"Camera snapshot failed: {e}")
+            except Exception as e:
+                logger.exception(f"Camera snapshot failed: {e}")
@@ -0,0 +1,160 @@
+# app/workers.py
+# [설명] : 멀티 프로세스 모드 (WORKER_PROCESSES > 0)
+#   - 워커 프로세스 N 개: 서로 겹치지 않는 코어 집합에 고정(sched_setaffinity) + torch 스레드 수 = 코어 수
+#     (모델 / 스케줄러 / 파이프라인 / Prometheus 는 워커마다 독립)
+#   - 카메라 라우팅
+#       "dispatcher" : 메인 프로세스가 GRPC_PORT 에서 받아 serial_number 해시로 워커 포트에 전달 (카메라-워커 고정)
+#       "reuseport"  : 워커들이 SO_REUSEPORT 로 GRPC_PORT 를 같이 listen, 커널이 연결 단위로 분배
+#                      (메인 프로세스 hop 없음, 카메라가 재연결하면 다른 워커로 갈 수 있음)
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+import zlib
+import grpc
+from prometheus_client import start_http_server
+from protos import streaming_pb2_grpc, streaming_pb2
+from constants import (
+    GRPC_PORT, GRPC_MAX_CONCURRENT_RPCS, METRICS_PORT,
+    WORKER_PROCESSES, WORKER_ROUTING, WORKER_BASE_PORT, WORKER_RESTART_DELAY, FRAME_STORE
+)
+
+logger = logging.getLogger(__name__)
+
+def partition_cores(n, cores=None):
+    # 사용 가능한 코어를 n 개의 연속 구간으로 분할 (코어가 워커보다 적으면 일부 워커가 코어를 공유)
+    cores = sorted(os.sched_getaffinity(0) if cores is None else cores)
+    if n >= len(cores):
+        return [[cores[i % len(cores)]] for i in range(n)]
+    size, extra = divmod(len(cores), n)
+    groups, start = [], 0
+    for i in range(n):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(cores[start:end])
+        start = end
+    return groups
+
+def worker_port(index):
+    return GRPC_PORT if WORKER_ROUTING == "reuseport" else WORKER_BASE_PORT + index
+
+def run_worker(index, cores):
+    # spawn 된 워커 프로세스 진입점: 코어 고정 -> 스레드 수 설정 -> gRPC 서버 실행
+    os.sched_setaffinity(0, cores)
+    import cv2
+    import torch
+    torch.set_num_threads(len(cores))
+    torch.set_num_interop_threads(1)
+    cv2.setNumThreads(1)  # OpenCV 내부 스레드가 torch 스레드와 같은 코어를 두고 경쟁하지 않도록
+
+    from main import serve
+    logging.basicConfig(level=logging.INFO)
+    start_http_server(METRICS_PORT + 1 + index)
+    logger.info(f"Worker {index} (pid {os.getpid()}) pinned to cores {cores}, torch threads={len(cores)}")
+    options = [("grpc.so_reuseport", 1)] if WORKER_ROUTING == "reuseport" else [("grpc.so_reuseport", 0)]
+    serve(port=worker_port(index), options=options)
+
+class FrontServicer(streaming_pb2_grpc.FrameStreamerServicer):
+    """
+    dispatcher 라우팅: 프레임을 디코딩하지 않고 serial_number 해시로 워커에 그대로 전달
+    (같은 카메라는 항상 같은 워커 -> accumulator / latent 캐시 / 스트리밍 상태가 한 프로세스에 모임)
+    - grpc.aio 로 중계 (스트림 하나가 스레드 하나를 잡지 않으므로 동시 스트림 수가 스레드 풀 크기에 묶이지 않음)
+    """
+    def __init__(self, ports):
+        self.channels = [grpc.aio.insecure_channel(f"127.0.0.1:{port}") for port in ports]
+        self.stubs = [streaming_pb2_grpc.FrameStreamerStub(channel) for channel in self.channels]
+
+    def route(self, serial_number):
+        return self.stubs[zlib.crc32(serial_number.encode()) % len(self.stubs)]
+
+    async def SendFrame(self, request, context):
+        try:
+            return await self.route(request.serial_number).SendFrame(request)
+        except grpc.aio.AioRpcError as e:
+            logger.warning(f"Forwarding frame from serial_number {request.serial_number} failed: {e.code()}")
+            context.set_code(e.code())
+            context.set_details(e.details() or 'Worker unavailable')
+            context.set_trailing_metadata(e.trailing_metadata() or ())  # 워커의 cluster-owner 등 그대로 전달
+            return streaming_pb2.Response(status="Frame processing failed")
+
+    async def StreamFrames(self, request_iterator, context):
+        # 스트림 첫 프레임의 serial_number 로 워커를 정하고, 이후 스트림 전체를 그 워커로 중계
+        requests = request_iterator.__aiter__()
+        try:
+            first = await requests.__anext__()
+        except StopAsyncIteration:
+            return
+
+        async def forward():
+            yield first
+            async for request in requests:
+                yield request
+
+        try:
+            async for ack in self.route(first.serial_number).StreamFrames(forward()):
+                yield ack
+        except grpc.aio.AioRpcError as e:
+            logger.warning(f"Forwarding stream from serial_number {first.serial_number} failed: {e.code()}")
+            await context.abort(e.code(), e.details() or 'Worker unavailable', e.trailing_metadata() or ())
+
+    async def LookupOwner(self, request, context):
+        # 클러스터 담당 노드 조회도 그 카메라를 맡은 워커에 전달
+        try:
+            return await self.route(request.serial_number).LookupOwner(request)
+        except grpc.aio.AioRpcError as e:
+            logger.warning(f"Forwarding owner lookup for serial_number {request.serial_number} failed: {e.code()}")
+            await context.abort(e.code(), e.details() or 'Worker unavailable', e.trailing_metadata() or ())
+
+def start_worker(ctx, index, cores):
+    # daemon 이 아니어야 워커 안에서 다시 프로세스(디코딩 풀 등)를 띄울 수 있음
+    process = ctx.Process(target=run_worker, args=(index, cores), name=f"inference-worker-{index}")
+    process.start()
+    return process
+
+def restart_dead(ctx, processes, groups):
+    # 워커 감시: 죽은 워커는 같은 코어 / 포트로 다시 띄움
+    for i, process in enumerate(processes):
+        if not process.is_alive():
+            logger.warning(f"Worker {i} exited with code {process.exitcode}, restarting")
+            processes[i] = start_worker(ctx, i, groups[i])
+
+async def serve_front(ctx, processes, groups):
+    server = grpc.aio.server(maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS)
+    ports = [worker_port(i) for i in range(WORKER_PROCESSES)]
+    streaming_pb2_grpc.add_FrameStreamerServicer_to_server(FrontServicer(ports), server)
+    server.add_insecure_port(f'[::]:{GRPC_PORT}')
+    await server.start()
+    logger.info(f"gRPC aio front dispatcher running on port {GRPC_PORT} -> workers {ports}")
+    try:
+        while True:
+            await asyncio.sleep(WORKER_RESTART_DELAY)
+            restart_dead(ctx, processes, groups)
+    finally:
+        await server.stop(0)
+
+def serve_workers():
+    if FRAME_STORE == "shm" and WORKER_ROUTING == "reuseport":
+        # reuseport 는 재연결한 카메라가 다른 워커로 갈 수 있어 같은 ring 파일에 두 프로세스가 쓰게 됨
+        raise ValueError('FRAME_STORE = "shm" needs WORKER_ROUTING = "dispatcher" (one writer process per camera ring)')
+    ctx = multiprocessing.get_context("spawn")  # torch / grpc 스레드가 있는 프로세스는 fork 하지 않음
+    groups = partition_cores(WORKER_PROCESSES)
+    processes = [start_worker(ctx, i, cores) for i, cores in enumerate(groups)]
+
+    # SIGTERM 도 KeyboardInterrupt 와 같이 처리: 워커에 SIGTERM 을 보내고 (워커마다 마지막 snapshot / 클러스터 탈퇴) 종료를 기다림
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        if WORKER_ROUTING == "dispatcher":
+            asyncio.run(serve_front(ctx, processes, groups))
+        else:
+            while True:
+                time.sleep(WORKER_RESTART_DELAY)
+                restart_dead(ctx, processes, groups)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
@@ -0,0 +1,84 @@
+# tools/bench_precision.py
+# [설명] : 정밀도 모드(fp32 / int8_dynamic / int8_static / bf16)별 latency 와 fp32 대비 정확도 비교
+#   python tools/bench_precision.py --checkpoint app/checkpoints/cnn_ae_gru_transformer_fast30.pth \
+#       --inputs recordings/*.mp4 --calibration-dir calibration [--labels labels.json]
+#   - 입력 동영상을 BUFFER_SIZE 윈도우(stride = BUFFER_SIZE // 2)로 나눠 각 모드로 추론
+#   - fp32 대비 확률 오차 / 판단 일치율, labels.json({"파일명": 0 또는 1}) 이 있으면 윈도우 정확도도 출력
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from detector import InferenceEngine
+from precision import PRECISIONS
+from constants import BUFFER_SIZE, PRED_THRESHOLD
+from eval_streaming import read_sequence
+
+def load_windows(paths, roi):
+    windows, names = [], []
+    stride = BUFFER_SIZE // 2
+    for path in paths:
+        frames = read_sequence(path, roi)
+        for end in range(BUFFER_SIZE, len(frames) + 1, stride):
+            windows.append(frames[end - BUFFER_SIZE:end])
+            names.append(os.path.basename(path))
+    return windows, names
+
+def run(engine, windows, batch):
+    probs = []
+    elapsed = 0.0
+    for i in range(0, len(windows), batch):
+        prepared = [engine.prepare_window(None, w) for w in windows[i:i + batch]]
+        start = time.perf_counter()
+        logits = engine.infer_windows(prepared)
+        elapsed += time.perf_counter() - start
+        probs.extend(torch.softmax(logits, dim=1)[:, 1].tolist())
+    return np.array(probs), elapsed / len(windows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency / accuracy tradeoff of reduced-precision CPU inference")
+    parser.add_argument("--checkpoint", required=True)
+    parser.add_argument("--inputs", nargs="+", required=True)
+    parser.add_argument("--precisions", nargs="+", default=list(PRECISIONS))
+    parser.add_argument("--calibration-dir", default=None)
+    parser.add_argument("--labels", default=None, help="JSON {video basename: 0|1}")
+    parser.add_argument("--roi", default=None, help="x,y,w,h crop applied to every frame")
+    parser.add_argument("--batch", type=int, default=1, help="windows per forward (1 = per-camera call)")
+    args = parser.parse_args()
+
+    roi = tuple(int(v) for v in args.roi.split(",")) if args.roi else None
+    windows, names = load_windows(args.inputs, roi)
+    if not windows:
+        sys.exit("No windows: inputs are shorter than BUFFER_SIZE frames")
+    labels = None
+    if args.labels:
+        with open(args.labels) as f:
+            label_map = json.load(f)
+        labels = np.array([label_map.get(n, -1) for n in names])
+
+    print(f"windows={len(windows)} batch={args.batch} threads={torch.get_num_threads()}")
+    print(f"{'precision':14s}{'ms/window':>10s}{'speedup':>9s}{'mean|Δp|':>10s}{'max|Δp|':>9s}{'agree':>8s}{'acc':>8s}")
+
+    reference, base_latency = None, None
+    for precision in ["fp32"] + [p for p in args.precisions if p != "fp32"]:
+        engine = InferenceEngine(model_path=args.checkpoint, device="cpu", buffer_size=BUFFER_SIZE,
+                                 backend="eager", precision=precision, calibration_dir=args.calibration_dir)
+        run(engine, windows[:args.batch], args.batch)  # warm-up
+        probs, latency = run(engine, windows, args.batch)
+        if reference is None:
+            reference, base_latency = probs, latency
+
+        diff = np.abs(probs - reference)
+        agree = np.mean((probs > PRED_THRESHOLD) == (reference > PRED_THRESHOLD))
+        acc = "-"
+        if labels is not None and np.any(labels >= 0):
+            mask = labels >= 0
+            acc = f"{np.mean((probs[mask] > PRED_THRESHOLD) == (labels[mask] == 1)) * 100:.1f}%"
+        print(f"{precision:14s}{latency * 1000:10.1f}{base_latency / latency:8.2f}x{diff.mean():10.4f}{diff.max():9.4f}{agree * 100:7.1f}%{acc:>8s}")
+
+if __name__ == "__main__":
+    main()
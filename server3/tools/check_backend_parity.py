@@ -0,0 +1,55 @@
+# tools/check_backend_parity.py
+# [설명] : 추론 백엔드(torchscript / compile / onnx) 출력이 eager 모델(CNNAE_LSTM_Transformer.forward)과 같은지 확인
+#   python tools/check_backend_parity.py --checkpoint app/checkpoints/cnn_ae_gru_transformer_fast30.pth
+#   - 랜덤 입력 [B, BUFFER_SIZE, 3, 224, 224] 로 logits 최대 오차 / 평균 latency 출력
+#   - 허용 오차(--atol)를 넘는 백엔드가 있으면 exit code 1
+import argparse
+import os
+import sys
+import time
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from detector import load_model
+from backends import BACKENDS, build_backend
+from constants import BUFFER_SIZE
+
+def run_backend(backend, x):
+    B, seq = x.shape[:2]
+    with torch.no_grad():
+        latent = backend.encode(x.view(B * seq, *x.shape[2:]))
+        return backend.classify(latent.view(B, seq, -1))
+
+def main():
+    parser = argparse.ArgumentParser(description="Check inference backend parity against the eager model")
+    parser.add_argument("--checkpoint", required=True)
+    parser.add_argument("--backends", nargs="+", default=[name for name in BACKENDS if name != "eager"])
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--atol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    model = load_model(args.checkpoint, torch.device("cpu"))
+    torch.manual_seed(0)
+    x = torch.randn(args.batch, BUFFER_SIZE, 3, 224, 224)
+    with torch.no_grad():
+        reference, _, _ = model(x)
+
+    failed = False
+    for name in ["eager"] + args.backends:
+        backend = build_backend(name, model, args.checkpoint, BUFFER_SIZE)
+        logits = run_backend(backend, x)  # warm-up (compile / ORT 초기화)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            logits = run_backend(backend, x)
+        elapsed = (time.perf_counter() - start) / args.repeat
+
+        err = (logits - reference).abs().max().item()
+        ok = err <= args.atol
+        failed |= not ok
+        print(f"{name:12s} max|Δlogits|={err:.2e} {'OK' if ok else 'FAIL'}  {elapsed * 1000:.1f}ms / batch of {args.batch}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
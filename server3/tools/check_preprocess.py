@@ -0,0 +1,67 @@
+# tools/check_preprocess.py
+# [설명] : 벡터화 전처리(cv2.resize + 일괄 정규화)가 기존 PIL/torchvision 전처리와 수치적으로 가까운지 확인
+#   python tools/check_preprocess.py --checkpoint app/checkpoints/cnn_ae_gru_transformer_fast30.pth [--inputs recordings/*.mp4]
+#   - 입력이 없으면 여러 해상도의 합성 프레임(그라디언트 + 노이즈)으로 비교
+#   - 픽셀 오차(정규화 단위) / 모델 fall 확률 오차가 허용치를 넘으면 exit code 1
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import cv2
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from detector import InferenceEngine
+from constants import BUFFER_SIZE
+from eval_streaming import read_sequence
+
+def synthetic_frames(count, seed=0):
+    # 실제 영상처럼 저주파 성분 위주 (순수 랜덤 노이즈는 보간 방식 차이가 과장됨)
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(count):
+        h, w = [(1080, 960), (720, 640), (480, 360), (300, 200), (160, 120)][i % 5]
+        yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+        base = np.stack([xx / w, yy / h, (xx + yy) / (w + h)], axis=-1) * 200
+        blobs = cv2.GaussianBlur(rng.normal(0, 40, (h, w, 3)).astype(np.float32), (0, 0), 5)
+        frames.append(np.clip(base + blobs + rng.normal(0, 4, (h, w, 3)), 0, 255).astype(np.uint8))
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare vectorized preprocessing with the PIL pipeline")
+    parser.add_argument("--checkpoint", required=True)
+    parser.add_argument("--inputs", nargs="*", default=[])
+    parser.add_argument("--pixel-tol", type=float, default=0.05, help="max mean |Δ| per frame (normalized units)")
+    parser.add_argument("--prob-tol", type=float, default=0.02)
+    args = parser.parse_args()
+
+    engine = InferenceEngine(model_path=args.checkpoint, device="cpu", buffer_size=BUFFER_SIZE)
+    frames = [f for path in args.inputs for f in read_sequence(path, None)] or synthetic_frames(BUFFER_SIZE * 4)
+    frames = frames[:len(frames) // BUFFER_SIZE * BUFFER_SIZE]
+
+    start = time.perf_counter()
+    reference = torch.stack([engine.preprocess(f) for f in frames])
+    pil_time = time.perf_counter() - start
+    start = time.perf_counter()
+    vectorized = engine.preprocess_batch(frames)
+    cv_time = time.perf_counter() - start
+
+    diff = (reference - vectorized).abs()
+    per_frame = diff.mean(dim=(1, 2, 3))
+    print(f"frames={len(frames)} pixel |Δ| mean={diff.mean():.4f} max={diff.max():.4f} worst frame mean={per_frame.max():.4f}")
+    print(f"preprocess time per frame: pil={pil_time / len(frames) * 1000:.2f}ms vectorized={cv_time / len(frames) * 1000:.2f}ms")
+
+    with torch.inference_mode():
+        seq = lambda x: x.contiguous().view(-1, BUFFER_SIZE, *x.shape[1:])
+        p_ref = torch.softmax(engine.model(seq(reference))[0], dim=1)[:, 1]
+        p_vec = torch.softmax(engine.model(seq(vectorized))[0], dim=1)[:, 1]
+    prob_err = (p_ref - p_vec).abs().max().item()
+    print(f"fall prob |Δ| max over {len(p_ref)} windows = {prob_err:.4f}")
+
+    ok = per_frame.max().item() <= args.pixel_tol and prob_err <= args.prob_tol
+    print("OK" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
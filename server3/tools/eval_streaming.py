@@ -0,0 +1,104 @@
+# tools/eval_streaming.py
+# [설명] : 녹화된 시퀀스로 스트리밍 추론(GRU hidden state 유지) vs 기존 윈도우 추론 결과 비교
+#   python tools/eval_streaming.py --checkpoint app/checkpoints/cnn_ae_gru_transformer_fast30.pth \
+#       --inputs recordings/fall_01.mp4 recordings/idle_02.mp4 [--roi x,y,w,h]
+#   - 입력: 동영상 파일 또는 cv2.VideoCapture 가 여는 이미지 시퀀스 패턴 (예: frames/%04d.jpg)
+#   - 윈도우 추론이 실행되는 시점(BUFFER_SIZE 마다 stride = BUFFER_SIZE // 2)에서 두 확률을 비교
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import cv2
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from detector import InferenceEngine
+from constants import BUFFER_SIZE, PRED_THRESHOLD, DECISION_WINDOW, STREAMING_DECISION_WINDOW
+
+def read_sequence(path, roi):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if roi is not None:
+            x, y, w, h = roi
+            frame = frame[y:y+h, x:x+w]
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def first_alarm(probs, decision_window):
+    # 연속 decision_window 번 임계값 초과한 첫 인덱스
+    run = 0
+    for i, p in enumerate(probs):
+        run = run + 1 if p > PRED_THRESHOLD else 0
+        if run >= decision_window:
+            return i
+    return None
+
+def evaluate(engine, name, frames):
+    stride = BUFFER_SIZE // 2
+
+    # 1) 기존 윈도우 추론 (cache 미사용, 매 윈도우 전체 forward)
+    window_probs, window_ends = [], []
+    start = time.perf_counter()
+    for end in range(BUFFER_SIZE, len(frames) + 1, stride):
+        logits = engine.run_batch_inference(frames[end - BUFFER_SIZE:end])
+        window_probs.append(torch.softmax(logits, dim=1)[0, 1].item())
+        window_ends.append(end - 1)
+    window_time = time.perf_counter() - start
+
+    # 2) 스트리밍 추론 (프레임마다 1 step)
+    engine.reset_stream(name)
+    stream_probs = []
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        logits = engine.run_step(name, frame, i)
+        stream_probs.append(torch.softmax(logits, dim=1)[0, 1].item())
+    stream_time = time.perf_counter() - start
+    engine.reset_stream(name)
+
+    window_probs = np.array(window_probs)
+    aligned = np.array([stream_probs[i] for i in window_ends])
+    diff = np.abs(window_probs - aligned)
+    agree = np.mean((window_probs > PRED_THRESHOLD) == (aligned > PRED_THRESHOLD))
+
+    w_alarm = first_alarm(window_probs, DECISION_WINDOW)
+    s_alarm = first_alarm(stream_probs, STREAMING_DECISION_WINDOW)
+    w_alarm_frame = window_ends[w_alarm] if w_alarm is not None else None
+
+    print(f"[{name}] frames={len(frames)} windows={len(window_probs)}")
+    print(f"  prob |window - streaming| : mean={diff.mean():.4f} max={diff.max():.4f} corr={np.corrcoef(window_probs, aligned)[0, 1]:.4f}")
+    print(f"  decision agreement @ {PRED_THRESHOLD}: {agree * 100:.1f}%")
+    print(f"  first alarm frame     : window={w_alarm_frame} streaming={s_alarm}")
+    print(f"  cpu time per frame    : window={window_time / len(frames) * 1000:.2f}ms streaming={stream_time / len(frames) * 1000:.2f}ms")
+    print(f"  latency per call      : window={window_time / len(window_probs) * 1000:.2f}ms streaming={stream_time / len(frames) * 1000:.2f}ms")
+    return diff
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare streaming vs windowed fall probabilities")
+    parser.add_argument("--checkpoint", required=True)
+    parser.add_argument("--inputs", nargs="+", required=True)
+    parser.add_argument("--roi", default=None, help="x,y,w,h crop applied to every frame")
+    args = parser.parse_args()
+
+    roi = tuple(int(v) for v in args.roi.split(",")) if args.roi else None
+    engine = InferenceEngine(model_path=args.checkpoint, device="cpu", buffer_size=BUFFER_SIZE)
+
+    diffs = []
+    for path in args.inputs:
+        frames = read_sequence(path, roi)
+        if len(frames) < BUFFER_SIZE:
+            print(f"[{path}] skipped: only {len(frames)} frames")
+            continue
+        diffs.append(evaluate(engine, os.path.basename(path), frames))
+
+    if diffs:
+        all_diff = np.concatenate(diffs)
+        print(f"[total] windows={len(all_diff)} mean|Δp|={all_diff.mean():.4f} p95|Δp|={np.percentile(all_diff, 95):.4f}")
+
+if __name__ == "__main__":
+    main()